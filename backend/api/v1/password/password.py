@@ -1,11 +1,16 @@
+import json
+from collections.abc import AsyncIterator
 from logging import getLogger
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
 
 from schemas.error import ErrorResponse
 from schemas.password import (
     PasswordAnalyzeRequest,
     PasswordAnalyzeResponse,
+    PasswordBatchGenerateRequest,
     PasswordGenerateRequest,
     PasswordGenerateResponse,
 )
@@ -47,6 +52,10 @@ async def generate_password(request: PasswordGenerateRequest):
     - **3 (Strong)**: Cracked in months to years
     - **4 (Very Strong)**: Cracked in centuries or never
 
+    The analysis runs off the event loop with a time budget. If zxcvbn
+    cannot finish in time, a cheaper estimate is returned and
+    `strength.approximate` is set.
+
     ## Example Response:
 
     ```
@@ -66,13 +75,14 @@ async def generate_password(request: PasswordGenerateRequest):
             "feedback": {
                 "warning": "",
                 "suggestions": []
-            }
+            },
+            "approximate": false
         }
     }
     ```
     """
     try:
-        result = PasswordGeneratorService.generate_password(
+        result = await PasswordGeneratorService.generate_password(
             length=request.length,
             uppercase=request.include_uppercase,
             lowercase=request.include_lowercase,
@@ -93,6 +103,7 @@ async def generate_password(request: PasswordGenerateRequest):
                 "message": e.message,
                 "context": e.context,
             },
+            headers=e.headers,
         )
     except Exception:
         logger.exception("Unexpected error during password generation")
@@ -102,6 +113,92 @@ async def generate_password(request: PasswordGenerateRequest):
         )
 
 
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves ``receive`` to the request body
+
+    Below ASGI spec 2.4 (uvicorn reports 2.3), StreamingResponse watches for
+    disconnects by calling ``receive`` next to the stream, which swallows
+    body chunks a stream still reading the request needs. A client going
+    away instead surfaces as ClientDisconnect from ``request.stream()``.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _stream_ndjson(results: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for result in results:
+        yield json.dumps(result, ensure_ascii=False).encode() + b"\n"
+
+
+@router.post(
+    "/generate/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Streamed passwords, one JSON object per line",
+        },
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+)
+async def generate_password_batch(request: PasswordBatchGenerateRequest):
+    """
+    Generate many passwords at once, streamed as NDJSON
+
+    Takes the same options as `POST /password/generate` plus `count`. Each
+    line holds `index`, `password` and `entropy_bits`, the exact entropy of
+    a uniformly random password from the selected characters
+    (log2(charset size) * length).
+
+    ## Strength Analysis:
+
+    zxcvbn is expensive and tells little about random passwords, so it only
+    runs where requested via `analyze`:
+    - **none** (default): entropy only
+    - **sample**: the first `sample_size` lines also carry `strength`
+    - **all**: every line carries `strength`
+
+    ## Example:
+    ```
+    {
+        "count": 5000,
+        "length": 20,
+        "analyze": "sample"
+    }
+    ```
+    """
+    try:
+        results = PasswordGeneratorService.generate_password_batch(
+            count=request.count,
+            length=request.length,
+            uppercase=request.include_uppercase,
+            lowercase=request.include_lowercase,
+            numbers=request.include_numbers,
+            symbols=request.include_symbols,
+            similar=request.include_similar,
+            analyze=request.analyze,
+            sample_size=request.sample_size,
+        )
+    except ServiceError as e:
+        logger.warning("Password batch generation error: %s", e.message)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "code": e.code,
+                "message": e.message,
+                "context": e.context,
+            },
+            headers=e.headers,
+        )
+
+    return StreamingResponse(_stream_ndjson(results), media_type="application/x-ndjson")
+
+
 @router.post(
     "/analyze",
     response_model=PasswordAnalyzeResponse,
@@ -112,7 +209,9 @@ async def generate_password(request: PasswordGenerateRequest):
 )
 async def analyze_password(request: PasswordAnalyzeRequest):
     try:
-        result = PasswordGeneratorService.analyze_strength(request.password)
+        result = await PasswordGeneratorService.estimate_strength(
+            request.password, request.user_inputs
+        )
         return PasswordAnalyzeResponse(info=result)
     except ServiceError as e:
         logger.warning("Password analysis error: %s", e.message)
@@ -123,6 +222,7 @@ async def analyze_password(request: PasswordAnalyzeRequest):
                 "message": e.message,
                 "context": e.context,
             },
+            headers=e.headers,
         )
     except Exception:
         logger.exception("Unexpected error during password analysis")
@@ -130,3 +230,69 @@ async def analyze_password(request: PasswordAnalyzeRequest):
             status_code=500,
             detail="Internal password analysis error",
         )
+
+
+@router.post(
+    "/analyze/batch",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/plain": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Streamed analyses, one JSON object per line",
+        },
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+)
+async def analyze_password_batch(request: Request):
+    """
+    Audit a list of passwords with zxcvbn, streamed in both directions
+
+    The body is read as it arrives and results are streamed back in input
+    order, so lists of any size can be scored without being held in memory.
+
+    ## Input:
+    One password per line. With `Content-Type: application/x-ndjson` each
+    line is a JSON string or an object with a `password` field; otherwise
+    lines are taken verbatim. Blank lines are skipped.
+
+    ## Output:
+    - `{"index": 0, "strength": {...}}` per password, where `index` is the
+      0-based line number; passwords are not echoed back
+    - `{"index": 3, "error": {"code": ..., "message": ...}}` for lines that
+      could not be analyzed (e.g. longer than 128 characters)
+    - a final `{"summary": {"total", "analyzed", "errors", "histogram"}}`,
+      the histogram counting passwords per strength bucket
+
+    Analyses are exact zxcvbn results, never the approximate estimate.
+    """
+    content_type = request.headers.get("content-type", "")
+    ndjson = content_type.split(";")[0].strip() in (
+        "application/x-ndjson",
+        "application/jsonl",
+    )
+    results = PasswordGeneratorService.analyze_password_batch(
+        request.stream(), ndjson=ndjson
+    )
+    return _DuplexStreamingResponse(
+        _stream_ndjson(results), media_type="application/x-ndjson"
+    )
+
+
+@router.get("/stats")
+async def get_password_stats():
+    return {
+        "strength_cache": PasswordGeneratorService.strength_cache.stats(),
+        "password_pool": PasswordGeneratorService.pool.stats(),
+        "dictionaries": [
+            index.info() for index in PasswordGeneratorService.load_dictionaries()
+        ],
+    }
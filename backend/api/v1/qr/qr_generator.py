@@ -1,9 +1,26 @@
+import base64
+import hashlib
+import io
+import json
+import zipfile
+from collections.abc import AsyncIterator
 from logging import getLogger
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 
+from core import metrics
+from core.config import settings
 from schemas.error import ErrorResponse
-from schemas.qr_generator import QRCodeRequest, QRCodeResponse
+from schemas.qr_generator import (
+    BatchOutputFormat,
+    OutputFormat,
+    QRCodeBatchRequest,
+    QRCodeImageQuery,
+    QRCodeRequest,
+    QRCodeResponse,
+)
 from services.exceptions import ServiceError
 from services.qr_generator_service import QRCodeGeneratorService
 
@@ -11,16 +28,146 @@ router = APIRouter(prefix="/generate")
 
 logger = getLogger(__name__)
 
+MEDIA_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+    "svg-path": "image/svg+xml",
+    "svg-fragment": "image/svg+xml",
+    "ascii": "text/plain; charset=utf-8",
+}
+
+
+def _negotiate_format(
+    accept: str | None, output_format: OutputFormat
+) -> OutputFormat | None:
+    """Pick a raw output format from the Accept header; None means JSON"""
+    if not accept:
+        return None
+
+    media_ranges = []
+    for media_range in accept.split(","):
+        media_type, _, params = media_range.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_ranges.append((quality, media_type.strip().lower()))
+
+    for quality, media_type in sorted(media_ranges, key=lambda r: -r[0]):
+        if quality <= 0:
+            continue
+        if media_type == "image/png":
+            return OutputFormat.png
+        if media_type == "image/webp":
+            return OutputFormat.webp
+        if media_type == "image/svg+xml":
+            if output_format.value.startswith("svg"):
+                return output_format
+            return OutputFormat.svg
+        if media_type == "text/plain":
+            return OutputFormat.ascii
+        if media_type in ("application/json", "application/*", "*/*"):
+            return None
+
+    return None
+
+
+def _server_timing(result: dict) -> str:
+    encoding = result["encoding"]
+    description = " ".join(filter(None, (result["format"], encoding["mode"])))
+    return f'encode;dur={encoding["encode_ms"]};desc="{description}"'
+
+
+def _etag(request_key: str, representation: str) -> str:
+    """ETag of one representation of a render, tied to the deployed version"""
+    digest = hashlib.sha256(
+        f"{settings.version}:{representation}:{request_key}".encode()
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check, using the weak comparison RFC 9110 asks for"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+def _cache_headers(etag: str, vary_accept: bool = False) -> dict[str, str]:
+    headers = {
+        "Cache-Control": (
+            f"public, max-age={settings.qr_http.cache_max_age}, immutable"
+        ),
+        "ETag": etag,
+    }
+    if vary_accept:
+        headers["Vary"] = "Accept"
+    return headers
+
+
+def _not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def _image_response(result: dict, headers: dict[str, str]) -> Response:
+    return Response(
+        content=result["image"],
+        media_type=MEDIA_TYPES[result["format"]],
+        headers={**headers, "Server-Timing": _server_timing(result)},
+    )
+
+
+def _static_json(content: dict, if_none_match: str | None) -> Response:
+    """Static metadata as JSON, revalidated by a hash of its content"""
+    body = json.dumps(content, separators=(",", ":")).encode()
+    headers = _cache_headers(f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return _not_modified(headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _encode_image(result: dict) -> str:
+    if isinstance(result["image"], bytes):
+        with metrics.timed("qr_generate", "base64"):
+            return base64.b64encode(result["image"]).decode("ascii")
+    return result["image"]
+
 
 @router.post(
     "",
     response_model=QRCodeResponse,
     responses={
+        200: {
+            "content": {
+                "image/png": {},
+                "image/webp": {},
+                "image/svg+xml": {},
+                "text/plain": {},
+            },
+            "description": "JSON by default, or the raw image when requested "
+            "via the Accept header",
+        },
+        304: {"description": "Not Modified"},
         400: {"model": ErrorResponse, "description": "Bad Request"},
         500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Render Queue Full"},
+        504: {"model": ErrorResponse, "description": "Render Timeout"},
     },
 )
-async def generate_qr_code(request: QRCodeRequest):
+async def generate_qr_code(
+    request: QRCodeRequest,
+    response: Response,
+    accept: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
     """
     Generate QR code with comprehensive styling options
 
@@ -30,10 +177,32 @@ async def generate_qr_code(request: QRCodeRequest):
     - **Advanced Styling**: Module drawers (circles, rounded, gapped, etc.)
     - **Gradients**: Radial, square, horizontal, vertical gradients
     - **Embedded Images**: Center logos/images
-    - **Multiple Formats**: PNG, SVG, ASCII
+    - **Multiple Formats**: PNG, lossless WebP, SVG, ASCII
     - **Error Correction**: L (7%), M (15%), Q (25%), H (30%)
     - **Custom Eyes**: Styled position markers
 
+    ## Raw Output:
+
+    By default the image is returned base64 encoded inside JSON. Send
+    `Accept: image/png`, `Accept: image/webp`, `Accept: image/svg+xml` or
+    `Accept: text/plain` to receive the PNG, WebP, SVG or ASCII output as the
+    raw response body instead.
+
+    ## Encoding:
+
+    PNGs are stored in the smallest lossless mode the render allows: 1-bit
+    for plain black on white, a palette for other codes with up to 64
+    colors (`png_palette_max_colors`), RGB otherwise. The JSON `encoding`
+    field (and the `Server-Timing` header of raw responses) reports the
+    mode, the encoded size in bytes and the encode time.
+
+    ## Caching:
+
+    Rendering is deterministic, so every response carries an `ETag`
+    derived from the canonical request and `Cache-Control: public,
+    immutable`. Repeating a request with `If-None-Match` answers
+    `304 Not Modified` without rendering.
+
     ## Examples:
 
     ### Basic QR Code:
@@ -73,15 +242,256 @@ async def generate_qr_code(request: QRCodeRequest):
     ```
     """
 
+    raw_format = _negotiate_format(accept, request.output_format)
+    options = dict(
+        data=request.data,
+        version=request.version,
+        box_size=request.box_size,
+        border=request.border,
+        error_correction=request.error_correction,
+        output_format=raw_format or request.output_format,
+        final_size=request.final_size,
+        sizing=request.sizing,
+        fill_color=request.fill_color,
+        back_color=request.back_color,
+        use_styled_image=request.use_styled_image,
+        module_drawer=request.module_drawer,
+        eye_drawer=request.eye_drawer,
+        color_mask=request.color_mask,
+        embedded_image=request.embedded_image,
+    )
+
+    # Raw bodies are byte-identical across renders; the JSON body is not
+    # (encode_ms varies), so it only gets a weak validator
+    request_key = QRCodeGeneratorService.request_key(**options)
+    if raw_format:
+        etag = _etag(request_key, "raw")
+    else:
+        etag = "W/" + _etag(request_key, "json")
+    headers = _cache_headers(etag, vary_accept=True)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(headers)
+
+    try:
+        result = await QRCodeGeneratorService.generate_qr(**options)
+
+        if raw_format:
+            return _image_response(result, headers)
+
+        response.headers.update(headers)
+        return QRCodeResponse(
+            image=_encode_image(result),
+            format=result["format"],
+            size=result["size"],
+            encoding=result["encoding"],
+        )
+
+    except ServiceError as e:
+        logger.warning("QR code generation error: %s", e.message)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "code": e.code,
+                "message": e.message,
+                "context": e.context,
+            },
+            headers=e.headers,
+        )
+
+    except Exception:
+        logger.exception("Unexpected error generating QR code")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal QR code generation error",
+        )
+
+
+@router.get(
+    ".png",
+    response_class=Response,
+    responses={
+        200: {"content": {"image/png": {}}, "description": "PNG image"},
+        304: {"description": "Not Modified"},
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Render Queue Full"},
+        504: {"model": ErrorResponse, "description": "Render Timeout"},
+    },
+)
+async def generate_qr_code_png(
+    query: Annotated[QRCodeImageQuery, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Generate a plain QR code and return the PNG directly
+
+    Suitable for `<img src="...">` tags and links. Accepts the basic
+    generation options as query parameters, e.g.
+    `/api/v1/qr/generate.png?data=https://example.com&box_size=8`.
+
+    Responses are cacheable (`ETag`, `Cache-Control: public, immutable`)
+    and revalidate with `If-None-Match`.
+    """
+
+    options = dict(
+        data=query.data,
+        version=query.version,
+        box_size=query.box_size,
+        border=query.border,
+        error_correction=query.error_correction,
+        output_format=OutputFormat.png,
+        final_size=query.final_size,
+        sizing=query.sizing,
+        fill_color=query.fill_color,
+        back_color=query.back_color,
+        use_styled_image=False,
+        module_drawer=None,
+        eye_drawer=None,
+        color_mask=None,
+        embedded_image=None,
+    )
+
+    headers = _cache_headers(
+        _etag(QRCodeGeneratorService.request_key(**options), "raw")
+    )
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return _not_modified(headers)
+
+    try:
+        result = await QRCodeGeneratorService.generate_qr(**options)
+
+        return _image_response(result, headers)
+
+    except ServiceError as e:
+        logger.warning("QR code generation error: %s", e.message)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "code": e.code,
+                "message": e.message,
+                "context": e.context,
+            },
+            headers=e.headers,
+        )
+
+    except Exception:
+        logger.exception("Unexpected error generating QR code")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal QR code generation error",
+        )
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable sink that lets zipfile stream its output"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+BATCH_FILE_EXTENSIONS = {
+    "png": "png",
+    "webp": "webp",
+    "svg": "svg",
+    "svg-path": "svg",
+    "svg-fragment": "svg",
+    "ascii": "txt",
+}
+
+
+async def _stream_ndjson(results: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for result in results:
+        if "image" in result:
+            result["image"] = _encode_image(result)
+        yield json.dumps(result, ensure_ascii=False).encode() + b"\n"
+
+
+async def _stream_zip(results: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    sink = _ZipSink()
+    # PNG is already deflated; storing keeps the archive cheap to produce
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for result in results:
+            name = f"{result['index']:05d}"
+            if "error" in result:
+                archive.writestr(
+                    f"{name}.error.json",
+                    json.dumps({"data": result["data"], "error": result["error"]}),
+                )
+            else:
+                extension = BATCH_FILE_EXTENSIONS[result["format"]]
+                archive.writestr(f"{name}.{extension}", result["image"])
+            yield sink.drain()
+    yield sink.drain()
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}, "application/zip": {}},
+            "description": "Streamed results, one entry per input payload",
+        },
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+)
+async def generate_qr_code_batch(request: QRCodeBatchRequest):
+    """
+    Generate many QR codes sharing one style configuration
+
+    All fields except `data` and `stream_format` are the same as for
+    `POST /generate` and apply to every code. Results are streamed back
+    in input order as soon as they are rendered.
+
+    ## Output formats:
+    - **ndjson**: one JSON object per line with `index`, `data`, `image`,
+      `format` and `size` (same encoding as `POST /generate`)
+    - **zip**: an archive with one file per code named by its index
+      (`00000.png`, `00001.png`, ...)
+
+    Items that fail to render are reported in place with an `error`
+    object (NDJSON) or an `<index>.error.json` entry (ZIP); the rest of the
+    batch is still produced.
+
+    ## Example:
+    ```
+    {
+        "data": ["TICKET-0001", "TICKET-0002", "TICKET-0003"],
+        "use_styled_image": true,
+        "module_drawer": {"type": "circle"},
+        "stream_format": "zip"
+    }
+    ```
+    """
+
     try:
-        result = await QRCodeGeneratorService.generate_qr(
-            data=request.data,
+        results = QRCodeGeneratorService.generate_qr_batch(
+            items=request.data,
             version=request.version,
             box_size=request.box_size,
             border=request.border,
             error_correction=request.error_correction,
             output_format=request.output_format,
             final_size=request.final_size,
+            sizing=request.sizing,
             fill_color=request.fill_color,
             back_color=request.back_color,
             use_styled_image=request.use_styled_image,
@@ -90,13 +500,8 @@ async def generate_qr_code(request: QRCodeRequest):
             color_mask=request.color_mask,
             embedded_image=request.embedded_image,
         )
-
-        return QRCodeResponse(
-            image=result["image"], format=result["format"], size=result["size"]
-        )
-
     except ServiceError as e:
-        logger.warning("QR code generation error: %s", e.message)
+        logger.warning("QR code batch generation error: %s", e.message)
         raise HTTPException(
             status_code=e.status_code,
             detail={
@@ -104,108 +509,137 @@ async def generate_qr_code(request: QRCodeRequest):
                 "message": e.message,
                 "context": e.context,
             },
+            headers=e.headers,
         )
 
-    except Exception:
-        logger.exception("Unexpected error generating QR code")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal QR code generation error",
+    if request.stream_format == BatchOutputFormat.zip:
+        return StreamingResponse(
+            _stream_zip(results),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="qr-codes.zip"'},
         )
 
+    return StreamingResponse(_stream_ndjson(results), media_type="application/x-ndjson")
+
 
 @router.get("/module-drawers")
-async def list_module_drawers():
-    return {
-        "module_drawers": [
-            {"type": "square", "description": "Standard square modules"},
-            {
-                "type": "gapped_square",
-                "description": "Square modules with gaps",
-                "supports_size_ratio": True,
-            },
-            {
-                "type": "circle",
-                "description": "Circular modules",
-                "supports_size_ratio": True,
-            },
-            {
-                "type": "rounded",
-                "description": "Rounded corner modules",
-                "supports_radius_ratio": True,
-            },
-            {"type": "vertical_bars", "description": "Vertical bar modules"},
-            {"type": "horizontal_bars", "description": "Horizontal bar modules"},
-        ]
-    }
+async def list_module_drawers(
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    return _static_json(
+        {
+            "module_drawers": [
+                {"type": "square", "description": "Standard square modules"},
+                {
+                    "type": "gapped_square",
+                    "description": "Square modules with gaps",
+                    "supports_size_ratio": True,
+                },
+                {
+                    "type": "circle",
+                    "description": "Circular modules",
+                    "supports_size_ratio": True,
+                },
+                {
+                    "type": "rounded",
+                    "description": "Rounded corner modules",
+                    "supports_radius_ratio": True,
+                },
+                {"type": "vertical_bars", "description": "Vertical bar modules"},
+                {"type": "horizontal_bars", "description": "Horizontal bar modules"},
+            ]
+        },
+        if_none_match,
+    )
 
 
 @router.get("/color-masks")
-async def list_color_masks():
-    return {
-        "color_masks": [
-            {
-                "type": "solid",
-                "description": "Solid fill color",
-                "params": ["front_color", "back_color"],
-            },
-            {
-                "type": "radial_gradient",
-                "description": "Radial gradient from center",
-                "params": ["center_color", "edge_color", "back_color"],
-            },
-            {
-                "type": "square_gradient",
-                "description": "Square gradient from center",
-                "params": ["center_color", "edge_color", "back_color"],
-            },
-            {
-                "type": "horizontal_gradient",
-                "description": "Horizontal gradient",
-                "params": ["left_color", "right_color", "back_color"],
-            },
-            {
-                "type": "vertical_gradient",
-                "description": "Vertical gradient",
-                "params": ["top_color", "bottom_color", "back_color"],
-            },
-            {
-                "type": "image",
-                "description": "Image-based coloring",
-                "params": ["color_mask_image", "back_color"],
-            },
-        ]
-    }
+async def list_color_masks(
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    return _static_json(
+        {
+            "color_masks": [
+                {
+                    "type": "solid",
+                    "description": "Solid fill color",
+                    "params": ["front_color", "back_color"],
+                },
+                {
+                    "type": "radial_gradient",
+                    "description": "Radial gradient from center",
+                    "params": ["center_color", "edge_color", "back_color"],
+                },
+                {
+                    "type": "square_gradient",
+                    "description": "Square gradient from center",
+                    "params": ["center_color", "edge_color", "back_color"],
+                },
+                {
+                    "type": "horizontal_gradient",
+                    "description": "Horizontal gradient",
+                    "params": ["left_color", "right_color", "back_color"],
+                },
+                {
+                    "type": "vertical_gradient",
+                    "description": "Vertical gradient",
+                    "params": ["top_color", "bottom_color", "back_color"],
+                },
+                {
+                    "type": "image",
+                    "description": "Image-based coloring",
+                    "params": ["color_mask_image", "back_color"],
+                },
+            ]
+        },
+        if_none_match,
+    )
 
 
 @router.get("/error-correction-levels")
-async def list_error_correction():
+async def list_error_correction(
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    return _static_json(
+        {
+            "levels": [
+                {
+                    "code": "L",
+                    "recovery": "~7%",
+                    "description": "Low - About 7% or less errors can be corrected",
+                },
+                {
+                    "code": "M",
+                    "recovery": "~15%",
+                    "description": (
+                        "Medium (default) - About 15%"
+                        " or less errors can be corrected"
+                    ),
+                },
+                {
+                    "code": "Q",
+                    "recovery": "~25%",
+                    "description": "Quartile - About 25% or less errors can be corrected",
+                },
+                {
+                    "code": "H",
+                    "recovery": "~30%",
+                    "description": (
+                        "High - About 30% or less errors can be corrected "
+                        "(recommended for embedded images)"
+                    ),
+                },
+            ]
+        },
+        if_none_match,
+    )
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
     return {
-        "levels": [
-            {
-                "code": "L",
-                "recovery": "~7%",
-                "description": "Low - About 7% or less errors can be corrected",
-            },
-            {
-                "code": "M",
-                "recovery": "~15%",
-                "description": (
-                    "Medium (default) - About 15%" " or less errors can be corrected"
-                ),
-            },
-            {
-                "code": "Q",
-                "recovery": "~25%",
-                "description": "Quartile - About 25% or less errors can be corrected",
-            },
-            {
-                "code": "H",
-                "recovery": "~30%",
-                "description": (
-                    "High - About 30% or less errors can be corrected "
-                    "(recommended for embedded images)"
-                ),
-            },
-        ]
+        "enabled": settings.qr_cache.enabled,
+        **QRCodeGeneratorService.render_cache.stats(),
+        "render_pool": QRCodeGeneratorService.render_pool.stats(),
+        "single_flight": QRCodeGeneratorService.render_flight.stats(),
     }
@@ -1,7 +1,12 @@
 from logging import getLogger
+from tempfile import SpooledTemporaryFile
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from starlette.datastructures import UploadFile
 
+from core.config import settings
 from schemas.error import ErrorResponse
 from schemas.qr_scanner import QRScanRequest, QRScanResponse
 from services.exceptions import ServiceError
@@ -11,6 +16,63 @@ router = APIRouter(prefix="/scan")
 
 logger = getLogger(__name__)
 
+BINARY_CONTENT_TYPES = ("application/octet-stream", "image/")
+# Room for multipart boundaries, part headers and the auto_resize field
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _body_validation_error(exc: ValidationError) -> RequestValidationError:
+    return RequestValidationError(
+        [{**error, "loc": ("body", *error["loc"])} for error in exc.errors()]
+    )
+
+
+def _upload_too_large() -> ServiceError:
+    return ServiceError(
+        code="image_too_large",
+        message="Uploaded image is too large",
+        status_code=413,
+        context={"max_bytes": settings.qr_scan_input.max_upload_bytes},
+    )
+
+
+def _check_content_length(request: Request, overhead: int = 0) -> None:
+    """Reject a declared oversized body before any of it is read"""
+    content_length = request.headers.get("content-length")
+    if not content_length:
+        return
+    try:
+        declared = int(content_length)
+    except ValueError as exc:
+        raise ServiceError(
+            code="invalid_content_length",
+            message="Content-Length header must be an integer",
+            status_code=400,
+        ) from exc
+    if declared > settings.qr_scan_input.max_upload_bytes + overhead:
+        raise _upload_too_large()
+
+
+async def _spool_body(request: Request) -> SpooledTemporaryFile:
+    """Stream the raw request body into memory, spilling to disk when large"""
+    config = settings.qr_scan_input
+    _check_content_length(request)
+
+    spool = SpooledTemporaryFile(max_size=config.spool_max_memory)
+    try:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > config.max_upload_bytes:
+                raise _upload_too_large()
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool
+
 
 @router.post(
     "",
@@ -18,10 +80,34 @@ logger = getLogger(__name__)
     responses={
         400: {"model": ErrorResponse, "description": "Bad Request"},
         404: {"model": ErrorResponse, "description": "No QR Code Found"},
+        413: {"model": ErrorResponse, "description": "Image Too Large"},
         500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Scan Queue Full"},
+        504: {"model": ErrorResponse, "description": "Scan Timeout"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": QRScanRequest.model_json_schema()},
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "image": {"type": "string", "format": "binary"},
+                            "auto_resize": {"type": "boolean", "default": True},
+                        },
+                        "required": ["image"],
+                    }
+                },
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+            },
+        }
     },
 )
-async def scan_qr_code(request: QRScanRequest):
+async def scan_qr_code(request: Request, auto_resize: bool = True):
     """
     Scan and decode QR code(s) from an image using qrlyzer
 
@@ -42,6 +128,17 @@ async def scan_qr_code(request: QRScanRequest):
     - High-resolution photos
     - Images with multiple QR codes at different scales
 
+    ## Upload Formats:
+
+    - **application/json**: base64 encoded image (optionally a data URL)
+    - **multipart/form-data**: `image` file field plus optional `auto_resize`
+    - **application/octet-stream** or `image/*`: the raw image as the
+      request body, with `auto_resize` as a query parameter
+
+    Binary uploads skip base64 entirely and are spooled once, then decoded
+    straight from the spooled file, which keeps memory use low for large
+    photos.
+
     ## Example Request:
 
     ```
@@ -65,10 +162,70 @@ async def scan_qr_code(request: QRScanRequest):
     ```
     """
 
+    content_type = request.headers.get("content-type", "application/json")
+    media_type = content_type.partition(";")[0].strip().lower()
+
     try:
-        result = await QRCodeScannerService.scan_qr(
-            image_base64=request.image, auto_resize=request.auto_resize
-        )
+        if media_type == "multipart/form-data":
+            # The form parser spools the whole upload before the file size
+            # below can be checked
+            _check_content_length(request, MULTIPART_OVERHEAD)
+            form = await request.form(max_files=1)
+            try:
+                upload = form.get("image")
+                if not isinstance(upload, UploadFile):
+                    raise ServiceError(
+                        code="missing_image",
+                        message="Multipart upload must contain an 'image' file",
+                        status_code=400,
+                    )
+                if (
+                    upload.size is not None
+                    and upload.size > settings.qr_scan_input.max_upload_bytes
+                ):
+                    raise _upload_too_large()
+
+                try:
+                    form_auto_resize = TypeAdapter(bool).validate_python(
+                        form.get("auto_resize", True)
+                    )
+                except ValidationError as exc:
+                    raise RequestValidationError(
+                        [
+                            {**error, "loc": ("body", "auto_resize")}
+                            for error in exc.errors()
+                        ]
+                    ) from exc
+            except BaseException:
+                await form.close()
+                raise
+
+            # The scan closes the upload (the form's only file) once the
+            # worker is done with it, which can outlive this request
+            result = await QRCodeScannerService.scan_qr_file(
+                image_file=upload.file,
+                auto_resize=form_auto_resize,
+                is_cancelled=request.is_disconnected,
+            )
+
+        elif media_type.startswith(BINARY_CONTENT_TYPES):
+            result = await QRCodeScannerService.scan_qr_file(
+                image_file=await _spool_body(request),
+                auto_resize=auto_resize,
+                is_cancelled=request.is_disconnected,
+            )
+
+        else:
+            try:
+                scan_request = QRScanRequest.model_validate_json(await request.body())
+            except ValidationError as exc:
+                raise _body_validation_error(exc) from exc
+
+            result = await QRCodeScannerService.scan_qr(
+                image_base64=scan_request.image,
+                auto_resize=scan_request.auto_resize,
+                is_cancelled=request.is_disconnected,
+            )
 
         return QRScanResponse(
             codes=result["codes"],
@@ -85,11 +242,23 @@ async def scan_qr_code(request: QRScanRequest):
                 "message": e.message,
                 "context": e.context,
             },
+            headers=e.headers,
         )
 
+    except RequestValidationError:
+        raise
+
     except Exception:
         logger.exception("Unexpected error scanning QR code")
         raise HTTPException(
             status_code=500,
             detail="Internal QR code scanning error",
         )
+
+
+@router.get("/stats")
+async def get_scan_stats():
+    return {
+        "scan_pool": QRCodeScannerService.scan_pool.stats(),
+        "single_flight": QRCodeScannerService.scan_flight.stats(),
+    }
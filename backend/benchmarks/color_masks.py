@@ -0,0 +1,138 @@
+"""
+Color mask timings: qrcode's per-pixel masks against services.qr_color_masks
+
+Each mask type is rendered with both implementations on the same code and
+drawer; the report lists the best time of each and how far the outputs
+differ (largest channel difference and share of differing pixels).
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.color_masks --version 10 --box-size 10
+"""
+
+import argparse
+import copy
+import json
+import time
+
+from PIL import Image, ImageChops
+from qrcode import ERROR_CORRECT_H, QRCode
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles import colormasks
+from qrcode.image.styles.moduledrawers.pil import (
+    CircleModuleDrawer,
+    RoundedModuleDrawer,
+    SquareModuleDrawer,
+)
+
+from services import qr_color_masks
+
+BACK = (255, 255, 255)
+START = (200, 20, 20)
+END = (20, 20, 200)
+PATTERN = Image.radial_gradient("L").convert("RGB")
+
+MASKS = {
+    "solid": (
+        colormasks.SolidFillColorMask(back_color=BACK, front_color=START),
+        qr_color_masks.SolidColorMask(back_color=BACK, front_color=START),
+    ),
+    "radial_gradient": (
+        colormasks.RadialGradiantColorMask(BACK, START, END),
+        qr_color_masks.RadialGradientColorMask(BACK, START, END),
+    ),
+    "square_gradient": (
+        colormasks.SquareGradiantColorMask(BACK, START, END),
+        qr_color_masks.SquareGradientColorMask(BACK, START, END),
+    ),
+    "horizontal_gradient": (
+        colormasks.HorizontalGradiantColorMask(BACK, START, END),
+        qr_color_masks.HorizontalGradientColorMask(BACK, START, END),
+    ),
+    "vertical_gradient": (
+        colormasks.VerticalGradiantColorMask(BACK, START, END),
+        qr_color_masks.VerticalGradientColorMask(BACK, START, END),
+    ),
+    "image": (
+        colormasks.ImageColorMask(BACK, color_mask_image=PATTERN),
+        qr_color_masks.ImagePatternColorMask(BACK, color_mask_image=PATTERN),
+    ),
+}
+
+DRAWERS = {
+    "square": SquareModuleDrawer,
+    "circle": CircleModuleDrawer,
+    "rounded": RoundedModuleDrawer,
+}
+
+
+def render(qr: QRCode, mask, drawer: str, repeat: int) -> tuple[Image.Image, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        image = qr.make_image(
+            image_factory=StyledPilImage,
+            module_drawer=DRAWERS[drawer](),
+            color_mask=copy.copy(mask),
+        ).get_image()
+        best = min(best, time.perf_counter() - started)
+    return image, best
+
+
+def compare(before: Image.Image, after: Image.Image) -> dict:
+    difference = ImageChops.difference(before, after)
+    changed = difference.convert("L").point(lambda value: 255 if value else 0)
+    return {
+        "max_channel_diff": max(high for _, high in difference.getextrema()),
+        "diff_pixels_pct": round(
+            100 * changed.histogram()[255] / (before.width * before.height), 3
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--version", type=int, default=10)
+    parser.add_argument("--box-size", type=int, default=10)
+    parser.add_argument("--drawer", choices=DRAWERS, default="square")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mask", choices=MASKS, action="append")
+    args = parser.parse_args()
+
+    qr = QRCode(
+        version=args.version, box_size=args.box_size, error_correction=ERROR_CORRECT_H
+    )
+    qr.add_data("artifice")
+    qr.make(fit=False)
+
+    results = []
+    for name in args.mask or MASKS:
+        library_mask, mask = MASKS[name]
+        before, library_seconds = render(qr, library_mask, args.drawer, args.repeat)
+        after, seconds = render(qr, mask, args.drawer, args.repeat)
+        results.append(
+            {
+                "mask": name,
+                "library_seconds": round(library_seconds, 4),
+                "seconds": round(seconds, 4),
+                "speedup": round(library_seconds / seconds, 1),
+                **compare(before, after),
+            }
+        )
+
+    print(
+        json.dumps(
+            {
+                "version": args.version,
+                "box_size": args.box_size,
+                "drawer": args.drawer,
+                "pixels": before.width * before.height,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
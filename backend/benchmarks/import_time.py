@@ -0,0 +1,75 @@
+"""
+Startup cost: import time of the app's modules, each in a fresh interpreter
+
+Every module is imported in a new Python process so nothing is shared or
+cached between measurements; the report lists the best wall time of each
+and which heavy dependencies the import pulled in. Uvicorn workers and
+export_openapi.py pay the ``main`` figure on every start.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.import_time --repeat 5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = (
+    "main",
+    "api.v1",
+    "services.qr_generator_service",
+    "services.qr_scanner_service",
+    "services.password",
+    "services.workers",
+    "core.config",
+    "fastapi",
+    "zxcvbn",
+    "qrcode",
+    "PIL.Image",
+    "qrlyzer",
+)
+HEAVY = ("zxcvbn", "qrcode", "PIL", "qrlyzer", "multiprocessing")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps([seconds, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def measure(module: str, repeat: int) -> tuple[float, list[str]]:
+    best, loaded = float("inf"), []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        seconds, loaded = json.loads(output)
+        best = min(best, seconds)
+    return best, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--module", action="append")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.module or MODULES:
+        seconds, loaded = measure(module, args.repeat)
+        results.append(
+            {"module": module, "import_ms": round(seconds * 1000, 1), "loads": loaded}
+        )
+
+    print(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Custom zxcvbn dictionaries: a ranked Python dict against the memory-mapped RankedIndex
+
+A synthetic word list is loaded both ways: as the ``{word: rank}`` dict
+zxcvbn would build, and as a compiled index file. The report lists the time
+and Python heap needed to load each, the mean lookup time, and the mean
+zxcvbn analysis time with the dictionary registered, after checking that
+both return the same ranks. ``builtin_only_zxcvbn_ms`` is the analysis
+time with zxcvbn's own lists alone.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.password_dictionaries --words 1000000
+"""
+
+import argparse
+import json
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+from zxcvbn import matching, zxcvbn
+
+from services.password import MAX_ANALYZE_LENGTH
+from services.password_dictionaries import load_index
+
+
+def write_words(path: Path, count: int, seed: int) -> list[str]:
+    """Distinct random words, so ranks don't depend on duplicate handling"""
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+    words = dict.fromkeys(
+        "".join(rng.choices(alphabet, k=rng.randint(6, 14))) for _ in range(count)
+    )
+    path.write_text("\n".join(words) + "\n")
+    return list(words)
+
+
+def measure_load(load: Callable[[], Mapping]) -> tuple[Mapping, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    loaded = load()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return loaded, seconds, peak
+
+
+def mean_seconds(fn: Callable[[str], object], inputs: list[str]) -> float:
+    started = time.perf_counter()
+    for value in inputs:
+        fn(value)
+    return (time.perf_counter() - started) / len(inputs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--passwords", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "corpus.txt"
+        words = write_words(source, args.words, args.seed)
+
+        def build_dict() -> dict:
+            with open(source) as file:
+                return matching.build_ranked_dict(line.strip() for line in file)
+
+        ranked, dict_seconds, dict_bytes = measure_load(build_dict)
+
+        started = time.perf_counter()
+        load_index(source, Path(directory), MAX_ANALYZE_LENGTH)
+        compile_seconds = time.perf_counter() - started
+        index, index_seconds, index_bytes = measure_load(
+            lambda: load_index(source, Path(directory), MAX_ANALYZE_LENGTH)
+        )
+
+        probes = rng.sample(words, min(args.lookups, len(words)))
+        probes += ["".join(rng.choices(string.ascii_letters, k=10)) for _ in probes]
+        mismatches = sum(
+            (probe in ranked) != (probe in index)
+            or (probe in ranked and ranked[probe] != index[probe])
+            for probe in probes
+        )
+
+        passwords = [
+            rng.choice(words) + str(rng.randint(0, 9999)) + rng.choice("!@#$")
+            for _ in range(args.passwords)
+        ]
+
+        def analyze(password: str) -> dict:
+            return zxcvbn(password, max_length=MAX_ANALYZE_LENGTH)
+
+        baseline_seconds = mean_seconds(analyze, passwords)
+        results = []
+        for name, dictionary, load_seconds, heap_bytes in (
+            ("dict", ranked, dict_seconds, dict_bytes),
+            ("mmap_index", index, index_seconds, index_bytes),
+        ):
+            matching.RANKED_DICTIONARIES["corpus"] = dictionary
+            results.append(
+                {
+                    "implementation": name,
+                    "load_seconds": round(load_seconds, 4),
+                    "heap_bytes": heap_bytes,
+                    "lookup_us": round(
+                        mean_seconds(dictionary.__contains__, probes) * 1e6, 3
+                    ),
+                    "zxcvbn_ms": round(mean_seconds(analyze, passwords) * 1e3, 3),
+                }
+            )
+        del matching.RANKED_DICTIONARIES["corpus"]
+
+        print(
+            json.dumps(
+                {
+                    "words": args.words,
+                    "index_bytes": index.info()["bytes"],
+                    "compile_seconds": round(compile_seconds, 3),
+                    "rank_mismatches": mismatches,
+                    "builtin_only_zxcvbn_ms": round(baseline_seconds * 1e3, 3),
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Password generation throughput: per-character secrets.choice against os.urandom blocks
+
+Both implementations generate the same number of passwords from the same
+charset; the report lists passwords per second for each and, as a sanity
+check of the output distribution, the largest relative deviation of any
+character's frequency from the uniform expectation.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.password_generation --count 100000 --length 16
+"""
+
+import argparse
+import json
+import secrets
+import time
+from collections import Counter
+from collections.abc import Callable
+
+from services.password import PasswordGeneratorService
+
+
+def secrets_passwords(charset: str, length: int, count: int) -> list[str]:
+    return [
+        "".join(secrets.choice(charset) for _ in range(length)) for _ in range(count)
+    ]
+
+
+def measure(
+    generate: Callable[[str, int, int], list[str]],
+    charset: str,
+    length: int,
+    count: int,
+    repeat: int,
+) -> tuple[list[str], float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        passwords = generate(charset, length, count)
+        best = min(best, time.perf_counter() - started)
+    return passwords, best
+
+
+def max_deviation_pct(charset: str, passwords: list[str]) -> float:
+    """Largest |observed / expected - 1| over the distinct charset characters"""
+    observed = Counter("".join(passwords))
+    total = sum(observed.values())
+    weights = Counter(charset)
+    return round(
+        100
+        * max(
+            abs(observed[char] / (total * weight / len(charset)) - 1)
+            for char, weight in weights.items()
+        ),
+        2,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--length", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-symbols", action="store_true")
+    parser.add_argument("--similar", action="store_true")
+    args = parser.parse_args()
+
+    charset = PasswordGeneratorService._build_charset(
+        uppercase=True,
+        lowercase=True,
+        numbers=True,
+        symbols=not args.no_symbols,
+        similar=args.similar,
+    )
+
+    results = []
+    for name, generate in (
+        ("secrets_choice", secrets_passwords),
+        ("urandom_translate", PasswordGeneratorService.random_passwords),
+    ):
+        passwords, seconds = measure(
+            generate, charset, args.length, args.count, args.repeat
+        )
+        results.append(
+            {
+                "implementation": name,
+                "seconds": round(seconds, 4),
+                "passwords_per_sec": round(args.count / seconds),
+                "max_frequency_deviation_pct": max_deviation_pct(charset, passwords),
+            }
+        )
+
+    print(
+        json.dumps(
+            {
+                "count": args.count,
+                "length": args.length,
+                "charset_size": len(charset),
+                "speedup": round(results[0]["seconds"] / results[1]["seconds"], 1),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
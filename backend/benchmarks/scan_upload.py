@@ -0,0 +1,138 @@
+"""
+Peak-RSS comparison of the QR scan upload paths
+
+Every case runs in a fresh interpreter, so ``ru_maxrss`` only reflects that
+single request. The payload is loaded before the baseline is sampled;
+``request_peak_mb`` is the growth caused by handling the request itself.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.scan_upload --size 4000
+    python -m benchmarks.scan_upload --size 8000 --format jpeg
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+CASES = ("json", "multipart", "binary")
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_image(size: int, image_format: str = "png") -> bytes:
+    """Noisy RGB image with a QR code in the middle, so it compresses poorly"""
+    import qrcode
+    from PIL import Image
+
+    image = Image.frombytes("RGB", (size, size), random.randbytes(size * size * 3))
+    box_size = max(10, size // 200)
+    code = qrcode.make("artifice scan benchmark", box_size=box_size, border=4)
+    code = code.get_image().convert("RGB")
+    image.paste(code, ((size - code.width) // 2, (size - code.height) // 2))
+
+    buffer = BytesIO()
+    if image_format == "jpeg":
+        image.save(buffer, format="JPEG", quality=75)
+    else:
+        image.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def run_case(case: str, path: str) -> dict:
+    os.environ["APP__QR_SCAN__BACKEND"] = "inline"
+
+    from fastapi.testclient import TestClient
+
+    from core.config import settings
+    from main import app
+
+    with open(path, "rb") as fp:
+        image = fp.read()
+
+    if case == "json":
+        payload = {"content": json.dumps({"image": base64.b64encode(image).decode()})}
+        headers = {"content-type": "application/json"}
+    elif case == "multipart":
+        payload = {"files": {"image": ("image.png", image, "image/png")}}
+        headers = {}
+    else:
+        payload = {"content": image}
+        headers = {"content-type": "application/octet-stream"}
+
+    with TestClient(app) as client:
+        baseline = _max_rss_mb()
+        started = time.perf_counter()
+        response = client.post("/api/v1/qr/scan", headers=headers, **payload)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "case": case,
+        "status": response.status_code,
+        "codes": response.json().get("codes"),
+        "max_pixels": settings.qr_scan_input.max_pixels,
+        "upload_mb": round(len(image) / 2**20, 2),
+        "baseline_mb": round(baseline, 1),
+        "peak_mb": round(_max_rss_mb(), 1),
+        "request_peak_mb": round(_max_rss_mb() - baseline, 1),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=4000, help="Image side in px")
+    parser.add_argument("--format", choices=("png", "jpeg"), default="png")
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--image", help=argparse.SUPPRESS)
+    parser.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        with open(args.image, "wb") as fp:
+            fp.write(make_image(args.size, args.format))
+        return
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.image)))
+        return
+
+    # Linux keeps ru_maxrss across exec, so even the test image is generated
+    # in a child to keep this process small for the cases it spawns
+    with tempfile.NamedTemporaryFile(suffix=f".{args.format}") as fp:
+        command = [sys.executable, "-m", "benchmarks.scan_upload", "--image", fp.name]
+        subprocess.run(
+            command + ["--generate", "--size", str(args.size), "--format", args.format],
+            check=True,
+        )
+
+        results = []
+        for case in CASES:
+            output = subprocess.run(
+                command + ["--case", case],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+
+    print(
+        json.dumps(
+            {"size": args.size, "format": args.format, "results": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
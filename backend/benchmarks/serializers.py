@@ -0,0 +1,113 @@
+"""
+SVG/ASCII timings: qrcode's SVG factories and print_ascii against services.qr_serializers
+
+Every output format is produced from the same encoded matrix with both
+implementations; the report lists the best time of each and the output
+size in characters.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.serializers --version 10 --box-size 10
+"""
+
+import argparse
+import io
+import json
+import time
+from collections.abc import Callable
+
+import qrcode.image.svg
+from qrcode import ERROR_CORRECT_M
+
+from services.qr_matrix import QRMatrix
+from services.qr_serializers import to_ascii, to_svg
+
+FACTORIES = {
+    "svg": qrcode.image.svg.SvgImage,
+    "svg-path": qrcode.image.svg.SvgPathImage,
+    "svg-fragment": qrcode.image.svg.SvgFragmentImage,
+}
+FORMATS = (*FACTORIES, "ascii")
+
+
+def library_serializer(
+    matrix: QRMatrix, output_format: str, box_size: int, border: int
+) -> Callable[[], str]:
+    def serialize() -> str:
+        qr = matrix.to_qrcode(ERROR_CORRECT_M, box_size=box_size, border=border)
+        if output_format == "ascii":
+            out = io.StringIO()
+            qr.print_ascii(out=out)
+            return out.getvalue()
+        image = qr.make_image(image_factory=FACTORIES[output_format])
+        return image.to_string(encoding="unicode")
+
+    return serialize
+
+
+def serializer(
+    matrix: QRMatrix, output_format: str, box_size: int, border: int
+) -> Callable[[], str]:
+    if output_format == "ascii":
+        return lambda: to_ascii(matrix, border)
+    fragment = output_format == "svg-fragment"
+    return lambda: to_svg(matrix, box_size, border, fragment)
+
+
+def measure(serialize: Callable[[], str], repeat: int) -> tuple[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = serialize()
+        best = min(best, time.perf_counter() - started)
+    return output, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--version", type=int, default=10)
+    parser.add_argument("--box-size", type=int, default=10)
+    parser.add_argument("--border", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--format", choices=FORMATS, action="append")
+    args = parser.parse_args()
+
+    matrix = QRMatrix.encode("artifice", args.version, ERROR_CORRECT_M)
+
+    results = []
+    for output_format in args.format or FORMATS:
+        before, library_seconds = measure(
+            library_serializer(matrix, output_format, args.box_size, args.border),
+            args.repeat,
+        )
+        after, seconds = measure(
+            serializer(matrix, output_format, args.box_size, args.border),
+            args.repeat,
+        )
+        results.append(
+            {
+                "format": output_format,
+                "library_seconds": round(library_seconds, 5),
+                "seconds": round(seconds, 5),
+                "speedup": round(library_seconds / seconds, 1),
+                "library_chars": len(before),
+                "chars": len(after),
+            }
+        )
+
+    print(
+        json.dumps(
+            {
+                "version": args.version,
+                "box_size": args.box_size,
+                "border": args.border,
+                "modules": matrix.size,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
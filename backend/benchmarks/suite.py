@@ -0,0 +1,349 @@
+"""
+Service benchmark suite: QR generation, QR scanning and passwords, with baseline comparison
+
+Every case goes through the service entry points the API calls
+(``generate_qr``, ``scan_qr``, ``generate_password``, ``estimate_strength``),
+with the response caches off so repeats redo the work. Generation covers
+every output format, module drawer and color mask, versions 1-40 and a
+range of box and final sizes; scanning covers generated codes and
+synthetic noisy photos; passwords cover generation and analysis across
+lengths.
+
+Pools run inline unless ``--pools`` is given, so timings leave out worker
+IPC. ``first_ms`` is the first call, which also fills the matrix and sprite
+caches; ``best_ms`` and ``median_ms`` cover all repeats. The report records
+the installed qrcode, Pillow, qrlyzer and zxcvbn versions; with
+``--baseline`` each case also gets the ratio of its median to the
+baseline's, cases slower than ``--threshold`` are listed as regressions
+and the exit status is 1.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 1.25
+    python -m benchmarks.suite --quick --only generate --only scan
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from functools import partial
+from importlib import metadata
+
+from PIL import Image, ImageFilter
+
+from core.config import settings
+from schemas.qr_generator import (
+    ColorMaskType,
+    ModuleDrawerType,
+    OutputFormat,
+    QRCodeRequest,
+    SizingMode,
+)
+from services.exceptions import ServiceError
+from services.password import MAX_ANALYZE_LENGTH, PasswordGeneratorService
+from services.qr_generator_service import QRCodeGeneratorService
+from services.qr_scanner_service import QRCodeScannerService
+
+PACKAGES = ("qrcode", "pillow", "qrlyzer", "zxcvbn", "fastapi")
+DATA = "https://example.com/artifice?benchmark=1"
+# Fits version 1, so every version can be forced with the same payload
+SHORT_DATA = "artifice"
+PASSWORD_LENGTHS = (8, 16, 32, 64, MAX_ANALYZE_LENGTH)
+WORDS = ("password", "dragon", "monkey", "sunshine", "letmein", "qwerty", "1234")
+
+# Run one repeat (numbered from 0) and return details worth reporting
+Case = tuple[str, Callable[[int], Awaitable[dict]]]
+
+
+def image_base64(image: Image.Image, format: str = "PNG") -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **({"quality": 85} if format == "JPEG" else {}))
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+async def generate(repeat: int, **fields) -> dict:
+    request = QRCodeRequest(**{"data": DATA, **fields})
+    result = await QRCodeGeneratorService.generate_qr(
+        **{name: getattr(request, name) for name in QRCodeRequest.model_fields}
+    )
+    return {"bytes": result["encoding"]["bytes"], "size": result["size"]}
+
+
+def generate_cases(quick: bool) -> Iterator[Case]:
+    for output_format in OutputFormat:
+        yield f"generate/format/{output_format.value}", partial(
+            generate, output_format=output_format
+        )
+
+    for drawer in ModuleDrawerType:
+        yield f"generate/drawer/{drawer.value}", partial(
+            generate, use_styled_image=True, module_drawer={"type": drawer}
+        )
+
+    pattern = image_base64(Image.radial_gradient("L").convert("RGB"))
+    for mask in ColorMaskType:
+        color_mask = {"type": mask}
+        if mask == ColorMaskType.image:
+            color_mask["color_mask_image"] = pattern
+        yield f"generate/mask/{mask.value}", partial(
+            generate, use_styled_image=True, color_mask=color_mask
+        )
+
+    for version in (1, 10, 20, 30, 40) if quick else range(1, 41):
+        yield f"generate/version/{version}", partial(
+            generate, data=SHORT_DATA, version=version
+        )
+
+    for box_size in (1, 5, 10, 20):
+        yield f"generate/box_size/{box_size}", partial(generate, box_size=box_size)
+
+    for final_size in (256, 1024, 2000):
+        for sizing in SizingMode:
+            yield f"generate/final_size/{final_size}/{sizing.value}", partial(
+                generate, final_size=final_size, sizing=sizing
+            )
+
+
+async def scan(repeat: int, image: str, expected: str) -> dict:
+    result = await QRCodeScannerService.scan_qr(image)
+    return {"decoded": result["codes"] == [expected]}
+
+
+def qr_image(data: str, version: int, box_size: int) -> Image.Image:
+    from qrcode import QRCode
+
+    qr = QRCode(version=version, box_size=box_size)
+    qr.add_data(data)
+    qr.make(fit=False)
+    return qr.make_image().get_image().convert("RGB")
+
+
+def noisy_photo(code: Image.Image, width: int, height: int, seed: int) -> Image.Image:
+    """
+    A QR code placed off-centre in a photo-sized frame of grey noise
+
+    The code spans a third of the shorter side and the frame is slightly
+    blurred, roughly what a phone photo of a printed code looks like.
+    """
+    rng = random.Random(seed)
+    noise = Image.frombytes("L", (width, height), rng.randbytes(width * height))
+    photo = noise.point(lambda value: 64 + value // 2).convert("RGB")
+    side = min(width, height) // 3
+    photo.paste(
+        code.resize((side, side), Image.Resampling.NEAREST),
+        (rng.randint(0, width - side), rng.randint(0, height - side)),
+    )
+    return photo.filter(ImageFilter.GaussianBlur(1))
+
+
+def scan_cases(quick: bool, seed: int) -> Iterator[Case]:
+    for version in (4, 10, 25, 40):
+        image = image_base64(qr_image(DATA, version, box_size=8))
+        yield f"scan/generated/version/{version}", partial(
+            scan, image=image, expected=DATA
+        )
+
+    sizes = [(1280, 960), (1920, 1080)]
+    if not quick:
+        sizes.append((4032, 3024))
+    code = qr_image(DATA, 5, box_size=1)
+    for width, height in sizes:
+        photo = noisy_photo(code, width, height, seed)
+        for format in ("png", "jpeg"):
+            yield f"scan/photo/{width}x{height}/{format}", partial(
+                scan, image=image_base64(photo, format.upper()), expected=DATA
+            )
+
+
+async def generate_password(repeat: int, length: int) -> dict:
+    result = await PasswordGeneratorService.generate_password(length)
+    return {"score": result["strength"].score}
+
+
+async def analyze(repeat: int, passwords: list[str]) -> dict:
+    info = await PasswordGeneratorService.estimate_strength(
+        passwords[repeat % len(passwords)]
+    )
+    return {"score": info.score, "approximate": info.approximate}
+
+
+def password_cases(repeat: int, seed: int) -> Iterator[Case]:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + string.punctuation
+    for length in PASSWORD_LENGTHS:
+        yield f"password/generate/{length}", partial(generate_password, length=length)
+
+        # A fresh password per repeat, as in real traffic
+        random_passwords = [
+            "".join(rng.choices(alphabet, k=length)) for _ in range(repeat)
+        ]
+        yield f"password/analyze/random/{length}", partial(
+            analyze, passwords=random_passwords
+        )
+
+        # Dictionary words and years make zxcvbn try many more matches
+        word_passwords = [
+            "".join(
+                rng.choice(WORDS) + str(rng.randint(1950, 2030))
+                for _ in range(length // 8 + 1)
+            )[:length]
+            for _ in range(repeat)
+        ]
+        yield f"password/analyze/words/{length}", partial(
+            analyze, passwords=word_passwords
+        )
+
+
+async def measure(
+    name: str, run: Callable[[int], Awaitable[dict]], repeat: int
+) -> dict:
+    timings = []
+    details: dict = {}
+    for index in range(repeat):
+        started = time.perf_counter()
+        try:
+            details = await run(index)
+        except ServiceError as exc:
+            return {"case": name, "error": exc.code}
+        timings.append(time.perf_counter() - started)
+    return {
+        "case": name,
+        "first_ms": round(timings[0] * 1e3, 3),
+        "best_ms": round(min(timings) * 1e3, 3),
+        "median_ms": round(statistics.median(timings) * 1e3, 3),
+        **details,
+    }
+
+
+def environment() -> dict:
+    packages = {}
+    for package in PACKAGES:
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "packages": packages,
+        "pools": {
+            "qr_render": settings.qr_render.backend,
+            "qr_scan": settings.qr_scan.backend,
+            "password": settings.password_pool.backend,
+        },
+    }
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """
+    Add each case's median ratio to the baseline; names of the regressions
+
+    Cases that fail now but passed in the baseline count as regressions too.
+    """
+    medians = {
+        result["case"]: result["median_ms"]
+        for result in baseline["results"]
+        if "error" not in result
+    }
+    regressions = []
+    for result in results:
+        before = medians.get(result["case"])
+        if not before:
+            continue
+        if "error" in result:
+            regressions.append(result["case"])
+            continue
+        result["baseline_ratio"] = round(result["median_ms"] / before, 3)
+        if result["baseline_ratio"] > threshold:
+            regressions.append(result["case"])
+    return regressions
+
+
+async def run_suite(args: argparse.Namespace) -> list[dict]:
+    await asyncio.gather(
+        QRCodeGeneratorService.warm_up(),
+        QRCodeScannerService.warm_up(),
+        PasswordGeneratorService.warm_up(),
+    )
+
+    cases: list[Case] = []
+    groups = args.only or ["generate", "scan", "password"]
+    if "generate" in groups:
+        cases += generate_cases(args.quick)
+    if "scan" in groups:
+        cases += scan_cases(args.quick, args.seed)
+    if "password" in groups:
+        cases += password_cases(args.repeat, args.seed)
+
+    results = []
+    try:
+        for name, run in cases:
+            results.append(await measure(name, run, args.repeat))
+            result = results[-1]
+            print(
+                f"{name}: {result.get('median_ms', result.get('error'))}",
+                file=sys.stderr,
+            )
+    finally:
+        for pool in (
+            QRCodeGeneratorService.render_pool,
+            QRCodeScannerService.scan_pool,
+            PasswordGeneratorService.pool,
+        ):
+            pool.shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument(
+        "--only", choices=("generate", "scan", "password"), action="append"
+    )
+    parser.add_argument("--pools", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=argparse.FileType("w"))
+    parser.add_argument("--baseline", type=argparse.FileType("r"))
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    settings.qr_cache.enabled = False
+    settings.password_cache.enabled = False
+    if not args.pools:
+        for config in (settings.qr_render, settings.qr_scan, settings.password_pool):
+            config.backend = "inline"
+
+    results = asyncio.run(run_suite(args))
+    report = {
+        "environment": environment(),
+        "repeat": args.repeat,
+        "quick": args.quick,
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        baseline = json.load(args.baseline)
+        regressions = compare(results, baseline, args.threshold)
+        report["baseline_environment"] = baseline["environment"]
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write(output + "\n")
+    print(output)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
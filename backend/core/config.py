@@ -1,4 +1,6 @@
-from typing import ClassVar
+import tempfile
+from pathlib import Path
+from typing import ClassVar, Literal
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -9,6 +11,78 @@ class UvicornConfig(BaseModel):
     port: int = 8000
 
 
+class CacheConfig(BaseModel):
+    enabled: bool = True
+    max_entries: int = 1024
+    max_bytes: int = 64 * 1024 * 1024
+    max_entry_bytes: int = 4 * 1024 * 1024
+    ttl: float | None = 3600
+
+
+class QRBatchConfig(BaseModel):
+    max_items: int = 10000
+    chunk_size: int = 32
+
+
+class PasswordBatchConfig(BaseModel):
+    max_count: int = 100_000
+    chunk_size: int = 1000
+    # zxcvbn takes milliseconds per password, so audit chunks are smaller
+    analyze_chunk_size: int = 100
+
+
+class PasswordAnalysisConfig(BaseModel):
+    # Seconds to wait for zxcvbn before answering with an approximate estimate
+    time_budget: float = 0.25
+
+
+class PasswordDictionaryConfig(BaseModel):
+    # Extra ranked word lists for zxcvbn, one word per line, most common
+    # first; each is matched under its file name without the extension
+    paths: list[Path] = []
+    # Where the compiled, memory-mapped indexes are kept
+    index_dir: Path = Path(tempfile.gettempdir()) / "artifice-dictionaries"
+
+
+class QRHttpConfig(BaseModel):
+    cache_max_age: int = 86400
+
+
+class QREncodeConfig(BaseModel):
+    # Store PNGs as 1-bit or palette images when the render allows it
+    reduce_colors: bool = True
+    png_palette_max_colors: int = 64
+    png_compress_level: int = 6
+    png_optimize: bool = False
+    webp_method: int = 4
+
+
+class QRScanInputConfig(BaseModel):
+    max_upload_bytes: int = 32 * 1024 * 1024
+    spool_max_memory: int = 1024 * 1024
+    # Decoded images are downscaled to at most this many pixels before the
+    # scan; qrlyzer's auto-resize never looks past 1280px anyway
+    max_pixels: int = 12_000_000
+
+
+class MetricsConfig(BaseModel):
+    # Serve /metrics and time requests and service stages
+    enabled: bool = True
+
+
+class SingleFlightConfig(BaseModel):
+    enabled: bool = True
+
+
+class WorkerPoolConfig(BaseModel):
+    backend: Literal["inline", "thread", "process"] = "process"
+    workers: int | None = None
+    max_queue: int = 32
+    timeout: float | None = 30
+    retry_after: int = 1
+    cancel_on_disconnect: bool = True
+
+
 class Settings(BaseSettings):
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(
         env_file=(".env.template", ".env"),
@@ -17,6 +91,33 @@ class Settings(BaseSettings):
         env_prefix="APP__",
     )
     run: UvicornConfig = UvicornConfig()
+    qr_cache: CacheConfig = CacheConfig()
+    qr_logo_cache: CacheConfig = CacheConfig(max_entries=64, max_bytes=32 * 1024 * 1024)
+    qr_sprite_cache: CacheConfig = CacheConfig(
+        max_entries=256, max_bytes=16 * 1024 * 1024, ttl=None
+    )
+    qr_matrix_cache: CacheConfig = CacheConfig(
+        max_entries=4096, max_bytes=16 * 1024 * 1024, ttl=None
+    )
+    qr_render: WorkerPoolConfig = WorkerPoolConfig()
+    qr_batch: QRBatchConfig = QRBatchConfig()
+    qr_http: QRHttpConfig = QRHttpConfig()
+    qr_encode: QREncodeConfig = QREncodeConfig()
+    # qrlyzer releases the GIL while decoding, so threads are enough here
+    qr_scan: WorkerPoolConfig = WorkerPoolConfig(backend="thread", max_queue=16)
+    qr_scan_input: QRScanInputConfig = QRScanInputConfig()
+    single_flight: SingleFlightConfig = SingleFlightConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    password_pool: WorkerPoolConfig = WorkerPoolConfig()
+    password_batch: PasswordBatchConfig = PasswordBatchConfig()
+    password_analysis: PasswordAnalysisConfig = PasswordAnalysisConfig()
+    password_cache: CacheConfig = CacheConfig(
+        max_entries=10_000, max_bytes=16 * 1024 * 1024
+    )
+    password_dictionaries: PasswordDictionaryConfig = PasswordDictionaryConfig()
+    # Start the worker pools at startup, warming each worker with a sample
+    # render or analysis, instead of on the first requests
+    warm_up: bool = True
     debug: bool
     version: str
 
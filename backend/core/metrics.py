@@ -0,0 +1,320 @@
+import bisect
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from typing import Any
+
+from starlette.routing import BaseRoute, Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+enabled = settings.metrics.enabled
+
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# 256 B to 64 MB in steps of 4
+BYTES_BUCKETS = tuple(float(4**power) for power in range(4, 14))
+# 100x100 to 10000x10000 pixels
+PIXELS_BUCKETS = (1e4, 4e4, 1.6e5, 6.4e5, 2.56e6, 1e7, 4e7, 1e8)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, description: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labelvalues: Any, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set
+
+    Bucket counts are kept per bucket and only made cumulative when
+    exposed, so an observation is one bisect and two additions.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [
+                (labelvalues, list(counts), total)
+                for labelvalues, (counts, total) in sorted(self._values.items())
+            ]
+        for labelvalues, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                labels = _labels(self.labelnames, labelvalues, le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+REGISTRY: list[Counter | Histogram] = []
+
+HTTP_REQUESTS = Counter(
+    "artifice_http_requests_total",
+    "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+HTTP_DURATION = Histogram(
+    "artifice_http_request_duration_seconds",
+    "HTTP request latency, until the last body chunk was sent",
+    ("method", "route"),
+)
+HTTP_REQUEST_BYTES = Histogram(
+    "artifice_http_request_size_bytes",
+    "HTTP request body size",
+    ("route",),
+    BYTES_BUCKETS,
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "artifice_http_response_size_bytes",
+    "HTTP response body size",
+    ("route",),
+    BYTES_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "artifice_stage_duration_seconds",
+    "Time spent in each stage of an operation",
+    ("operation", "stage"),
+)
+IMAGE_PIXELS = Histogram(
+    "artifice_image_pixels",
+    "Pixels of generated and scanned images",
+    ("operation",),
+    PIXELS_BUCKETS,
+)
+IMAGE_BYTES = Histogram(
+    "artifice_image_bytes",
+    "Encoded size of generated and scanned images",
+    ("operation",),
+    BYTES_BUCKETS,
+)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return "\n".join(line for metric in REGISTRY for line in metric.expose()) + "\n"
+
+
+class Stages:
+    """
+    Lap timer for the stages of one operation
+
+    ``lap(stage)`` books the time since the previous lap (or since creation)
+    under ``stage``, adding up repeated laps. ``durations`` is a plain dict,
+    so work running in a pool worker returns it with its result and the API
+    process observes it with ``observe_stages``.
+    """
+
+    __slots__ = ("durations", "_last")
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.durations[stage] = self.durations.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+class _NoStages:
+    """Stand-in for Stages while metrics are disabled"""
+
+    __slots__ = ()
+    durations: dict[str, float] = {}
+
+    def lap(self, stage: str) -> None:
+        pass
+
+
+NO_STAGES = _NoStages()
+
+
+def stages() -> Stages | _NoStages:
+    return Stages() if enabled else NO_STAGES
+
+
+def observe_stages(operation: str, durations: dict[str, float]) -> None:
+    for stage, seconds in durations.items():
+        STAGE_DURATION.observe(seconds, operation, stage)
+
+
+def observe_image(operation: str, pixels: int | None, size: int | None) -> None:
+    if not enabled:
+        return
+    if pixels is not None:
+        IMAGE_PIXELS.observe(pixels, operation)
+    if size is not None:
+        IMAGE_BYTES.observe(size, operation)
+
+
+@contextmanager
+def _timed(operation: str, stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, operation, stage)
+
+
+def timed(operation: str, stage: str):
+    """Context manager timing one stage that runs in the API process"""
+    return _timed(operation, stage) if enabled else nullcontext()
+
+
+def _route_templates(
+    routes: Iterable[BaseRoute], prefix: str = ""
+) -> Iterator[tuple[BaseRoute, str]]:
+    """Every route with its full path template, through mounts and included routers"""
+    for route in routes:
+        if isinstance(route, Mount):
+            yield from _route_templates(route.routes, prefix + route.path)
+        elif (router := getattr(route, "original_router", None)) is not None:
+            # Newer FastAPI versions keep included routers as lazy wrappers
+            # instead of copying their routes with the outer prefix applied
+            yield from _route_templates(
+                router.routes, prefix + route.include_context.prefix
+            )
+        elif (path_format := getattr(route, "path_format", None)) is not None:
+            yield route, prefix + path_format
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing requests per route
+
+    Requests are labelled with the matched route's full path template, so
+    the label sets stay bounded whatever paths clients send. Body sizes are
+    counted as messages pass through, which covers streamed requests and
+    responses without buffering them.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._templates: dict[int, str] | None = None
+
+    def _route_template(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            return "unmatched"
+        if self._templates is None:
+            # Mounted routes only know the path below their mount (and, on
+            # newer FastAPI, their router's prefix), so map each once
+            self._templates = {}
+            for template_route, template in _route_templates(scope["app"].routes):
+                self._templates.setdefault(id(template_route), template)
+        return self._templates.get(id(route), route.path)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            route = self._route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route, status)
+            HTTP_DURATION.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUEST_BYTES.observe(request_bytes, route)
+            HTTP_RESPONSE_BYTES.observe(response_bytes, route)
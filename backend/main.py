@@ -1,13 +1,39 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from api.v1 import api_router
+from core import metrics
 from core.config import settings
+from services.password import PasswordGeneratorService
+from services.qr_generator_service import QRCodeGeneratorService
+from services.qr_scanner_service import QRCodeScannerService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile stale dictionary indexes before any worker maps them
+    PasswordGeneratorService.load_dictionaries()
+    if settings.warm_up:
+        await asyncio.gather(
+            QRCodeGeneratorService.warm_up(),
+            QRCodeScannerService.warm_up(),
+            PasswordGeneratorService.warm_up(),
+        )
+    yield
+    QRCodeGeneratorService.render_pool.shutdown()
+    QRCodeScannerService.scan_pool.shutdown()
+    PasswordGeneratorService.pool.shutdown()
+
 
 app = FastAPI(
     title="Artifice Toolkit API",
     description="Many useful tools for many purposes",
     version=settings.version,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -18,6 +44,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics.enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(api_router)
 
 
@@ -38,6 +67,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request and service stage metrics"""
+    if not settings.metrics.enabled:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
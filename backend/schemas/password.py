@@ -11,6 +11,12 @@ class PasswordStrength(str, Enum):
     very_strong = "very_strong"  # 4
 
 
+class PasswordAnalyzeMode(str, Enum):
+    none = "none"
+    sample = "sample"
+    all = "all"
+
+
 class CrackTimes(BaseModel):
     offline_fast_hashing: str = Field(
         ..., description="Offline attack, fast hashing (10B/sec)"
@@ -48,6 +54,11 @@ class PasswordStrengthInfo(BaseModel):
     feedback: PasswordFeedback = Field(
         ..., description="Suggestions to improve password"
     )
+    approximate: bool = Field(
+        default=False,
+        description="True when zxcvbn ran out of time and a cheaper estimate "
+        "was used instead",
+    )
 
 
 class PasswordGenerateRequest(BaseModel):
@@ -79,8 +90,28 @@ class PasswordGenerateResponse(BaseModel):
     )
 
 
+class PasswordBatchGenerateRequest(PasswordGenerateRequest):
+    count: int = Field(default=100, ge=1, description="Number of passwords to generate")
+    analyze: PasswordAnalyzeMode = Field(
+        default=PasswordAnalyzeMode.none,
+        description="Run zxcvbn on no passwords, the first sample_size, or all",
+    )
+    sample_size: int = Field(
+        default=10,
+        ge=1,
+        le=1000,
+        description="Passwords analyzed with zxcvbn when analyze is 'sample'",
+    )
+
+
 class PasswordAnalyzeRequest(BaseModel):
     password: str = Field(..., max_length=128, description="Password to analyze")
+    user_inputs: list[str] = Field(
+        default_factory=list,
+        max_length=32,
+        description="Words the password should not be built from, such as the "
+        "user's name, email or the site name",
+    )
 
 
 class PasswordAnalyzeResponse(BaseModel):
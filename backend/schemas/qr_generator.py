@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Annotated
 
 from pydantic import BaseModel, Field
 
@@ -29,12 +30,23 @@ class ColorMaskType(str, Enum):
 
 class OutputFormat(str, Enum):
     png = "png"
+    webp = "webp"
     svg = "svg"
     svg_path = "svg-path"
     svg_fragment = "svg-fragment"
     ascii = "ascii"
 
 
+class SizingMode(str, Enum):
+    pixel_perfect = "pixel_perfect"
+    resample = "resample"
+
+
+class BatchOutputFormat(str, Enum):
+    ndjson = "ndjson"
+    zip = "zip"
+
+
 class ErrorCorrection(str, Enum):
     L = "L"
     M = "M"
@@ -127,13 +139,18 @@ class ColorMaskConfig(BaseModel):
     )
 
 
-class QRCodeRequest(BaseModel):
-    data: str = Field(
-        ...,
+QRData = Annotated[
+    str,
+    Field(
         min_length=1,
         max_length=3000,
         description="The data to be encoded in the QR code",
-    )
+    ),
+]
+
+
+class QRCodeBasicOptions(BaseModel):
+    """Plain (non-styled) PNG options, also accepted as query parameters"""
 
     # QR code parameters
     version: int | None = Field(
@@ -151,14 +168,17 @@ class QRCodeRequest(BaseModel):
     )
 
     # Output parameters
-    output_format: OutputFormat = Field(
-        default=OutputFormat.png, description="Output format"
-    )
     final_size: int | None = Field(
         default=None,
         ge=100,
         le=2000,
-        description="Final image size (for PNG only, after generation)",
+        description="Final image size (for PNG and WebP only, after generation)",
+    )
+    sizing: SizingMode = Field(
+        default=SizingMode.resample,
+        description="How final_size is reached: resample scales the box_size "
+        "render with LANCZOS, pixel_perfect renders whole-pixel modules straight "
+        "at that size and pads the remainder (sharper and faster)",
     )
 
     # Basic styling (for non-styled images)
@@ -173,6 +193,14 @@ class QRCodeRequest(BaseModel):
         description="Background color (basic mode only)",
     )
 
+
+class QRCodeOptions(QRCodeBasicOptions):
+    """Rendering options shared by single and batch generation"""
+
+    output_format: OutputFormat = Field(
+        default=OutputFormat.png, description="Output format"
+    )
+
     # Advanced styling (StyledPilImage)
     use_styled_image: bool = Field(
         default=False, description="Use StyledPilImage for advanced styling"
@@ -193,9 +221,34 @@ class QRCodeRequest(BaseModel):
     )
 
 
+class QRCodeRequest(QRCodeOptions):
+    data: QRData
+
+
+class QRCodeImageQuery(QRCodeBasicOptions):
+    model_config = {"extra": "forbid"}
+
+    data: QRData
+
+
+class QRCodeBatchRequest(QRCodeOptions):
+    data: list[QRData] = Field(
+        ..., min_length=1, description="Payloads to encode, one QR code each"
+    )
+    stream_format: BatchOutputFormat = Field(
+        default=BatchOutputFormat.ndjson,
+        description="Streamed response format: NDJSON lines or a ZIP archive",
+    )
+
+
 class QRCodeResponse(BaseModel):
     image: str = Field(description="Base64 encoded image or SVG/ASCII string")
     format: str = Field(description="Output format")
     size: dict | None = Field(
         default=None, description="Image dimensions if applicable"
     )
+    encoding: dict | None = Field(
+        default=None,
+        description="Encoded image mode (raster formats), size in bytes and "
+        "encode time in milliseconds",
+    )
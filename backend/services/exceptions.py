@@ -8,9 +8,18 @@ class ServiceError(Exception):
         message: str,
         status_code: int = 400,
         context: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> None:
         super().__init__(message)
         self.code = code
         self.message = message
         self.status_code = status_code
         self.context = context or {}
+        self.headers = headers
+
+    def __reduce__(self):
+        # Keep the error picklable so it survives process pool boundaries
+        return (
+            self.__class__,
+            (self.code, self.message, self.status_code, self.context, self.headers),
+        )
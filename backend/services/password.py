@@ -1,15 +1,66 @@
-import secrets
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import os
 import string
+import threading
+from collections import Counter, deque
+from collections.abc import AsyncIterator, Sequence
+from fractions import Fraction
+from functools import lru_cache
+from logging import getLogger
+from pathlib import Path
 
-from zxcvbn import zxcvbn
-
+from core import metrics
+from core.config import settings
 from schemas.password import (
     CrackTimes,
+    PasswordAnalyzeMode,
     PasswordFeedback,
     PasswordStrength,
     PasswordStrengthInfo,
 )
+from services.cache import LRUCache
 from services.exceptions import ServiceError
+from services.password_dictionaries import RankedIndex, load_index
+from services.workers import WorkerPool
+
+logger = getLogger(__name__)
+
+# Longest password the API accepts; zxcvbn refuses anything over 72 otherwise
+MAX_ANALYZE_LENGTH = 128
+# Longest input line kept for a batch analysis; enough for any JSON-encoded
+# password within MAX_ANALYZE_LENGTH, anything longer is rejected unread
+MAX_AUDIT_LINE_BYTES = 4096
+
+# zxcvbn's attack scenarios (guesses per second), score thresholds and
+# no-match feedback, so the approximate estimate doesn't import zxcvbn
+ATTACK_RATES = {
+    "online_throttling_100_per_hour": Fraction(100, 3600),
+    "online_no_throttling_10_per_second": Fraction(10),
+    "offline_slow_hashing_1e4_per_second": Fraction(10**4),
+    "offline_fast_hashing_1e10_per_second": Fraction(10**10),
+}
+# Fewest guesses for scores 1-4
+SCORE_THRESHOLDS = (10**3 + 5, 10**6 + 5, 10**8 + 5, 10**10 + 5)
+TIME_UNITS = (
+    ("year", 60 * 60 * 24 * 31 * 12),
+    ("month", 60 * 60 * 24 * 31),
+    ("day", 60 * 60 * 24),
+    ("hour", 60 * 60),
+    ("minute", 60),
+    ("second", 1),
+)
+CENTURY = 100 * TIME_UNITS[0][1]
+APPROXIMATE_FEEDBACK = {
+    "warning": "",
+    "suggestions": [
+        "Use a few words, avoid common phrases.",
+        "No need for symbols, digits, or uppercase letters.",
+    ],
+}
 
 
 class PasswordGeneratorService:
@@ -28,6 +79,29 @@ class PasswordGeneratorService:
         4: PasswordStrength.very_strong,
     }
 
+    pool = WorkerPool("password", settings.password_pool)
+    # zxcvbn matches against its module-global RANKED_DICTIONARIES, which
+    # each analysis rewrites with its user inputs. Analyses in one process
+    # take turns, so thread and inline pools never score a password against
+    # another request's inputs; the GIL serialises pure-Python zxcvbn anyway
+    _zxcvbn_lock = threading.RLock()
+
+    @classmethod
+    async def warm_up(cls) -> None:
+        """Start the password workers, each scoring a sample password once"""
+        await cls.pool.start(warm_up_worker)
+
+    # Analyses keyed by an HMAC of the password under a per-process secret,
+    # so the cache never holds plaintext or unsalted password hashes
+    strength_cache = LRUCache(
+        max_entries=settings.password_cache.max_entries,
+        max_bytes=settings.password_cache.max_bytes,
+        max_entry_bytes=settings.password_cache.max_entry_bytes,
+        ttl=settings.password_cache.ttl,
+        sizeof=lambda info: len(info.model_dump_json()),
+    )
+    _cache_secret = os.urandom(32)
+
     @classmethod
     def _build_charset(
         cls,
@@ -45,11 +119,241 @@ class PasswordGeneratorService:
         charset += cls.SIMILAR if similar else ""
         return charset
 
+    @classmethod
+    def _charset_or_error(
+        cls,
+        uppercase: bool,
+        lowercase: bool,
+        numbers: bool,
+        symbols: bool,
+        similar: bool,
+    ) -> str:
+        charset = cls._build_charset(uppercase, lowercase, numbers, symbols, similar)
+        if not charset:
+            raise ServiceError(
+                code="invalid_character_types",
+                message="At least one character type must be enabled",
+                status_code=400,
+            )
+        return charset
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _byte_table(charset: str) -> tuple[bytes, bytes, float]:
+        """
+        Translation table mapping random bytes onto ``charset`` without bias
+
+        Byte values below the largest multiple of ``len(charset)`` map to
+        ``charset[value % len(charset)]``; the rest are deleted (rejection
+        sampling), so every charset position stays equally likely, exactly
+        as with ``secrets.choice``. Returns the table, the rejected byte
+        values and the share of bytes kept.
+        """
+        size = len(charset)
+        limit = 256 - 256 % size
+        table = bytes(ord(charset[value % size]) for value in range(limit))
+        table += bytes(256 - limit)
+        return table, bytes(range(limit, 256)), limit / 256
+
+    @classmethod
+    def random_passwords(cls, charset: str, length: int, count: int) -> list[str]:
+        """
+        ``count`` uniformly random passwords drawn from ``charset``
+
+        Equivalent to ``"".join(secrets.choice(charset) for _ in range(length))``
+        per password, but all randomness comes from a few ``os.urandom`` blocks
+        mapped onto the charset with a single ``bytes.translate`` each.
+        """
+        table, rejected, kept = cls._byte_table(charset)
+        needed = length * count
+        drawn = bytearray()
+        while len(drawn) < needed:
+            missing = needed - len(drawn)
+            # Oversample slightly so one block is nearly always enough
+            block = os.urandom(int(missing / kept * 1.05) + 16)
+            drawn += block.translate(table, rejected)
+
+        text = drawn[:needed].decode("ascii")
+        return [text[start : start + length] for start in range(0, needed, length)]
+
+    @staticmethod
+    def entropy_bits(charset: str, length: int) -> float:
+        """
+        Exact entropy of a password drawn uniformly from ``charset``
+
+        This is log2(len(charset)) * length when every character is distinct;
+        characters listed more than once (the similar set overlaps the
+        others) are weighted by how often they can be drawn.
+        """
+        total = len(charset)
+        per_char = -sum(
+            count / total * math.log2(count / total)
+            for count in Counter(charset).values()
+        )
+        return round(per_char * length, 2)
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def load_dictionaries(cls) -> tuple[RankedIndex, ...]:
+        """
+        Map the configured word lists and register them with zxcvbn
+
+        Runs once per process: at startup in the API process, which also
+        compiles stale indexes, and on first use in each worker, which then
+        only maps the files. A list named like a built-in one replaces it.
+        """
+        config = settings.password_dictionaries
+        indexes = tuple(
+            load_index(Path(path), config.index_dir, MAX_ANALYZE_LENGTH)
+            for path in config.paths
+        )
+        if indexes:
+            from zxcvbn import matching
+
+            with cls._zxcvbn_lock:
+                for index in indexes:
+                    matching.RANKED_DICTIONARIES[index.name] = index
+            logger.info(
+                "Loaded password dictionaries: %s",
+                ", ".join(f"{index.name} ({index.entries})" for index in indexes),
+            )
+        return indexes
+
     # Based on Dropbox's zxcvbn
     @classmethod
-    def analyze_strength(cls, password: str) -> PasswordStrengthInfo:
-        result = zxcvbn(password)
+    def analyze_strength(
+        cls,
+        password: str,
+        user_inputs: Sequence[str] = (),
+        stages: metrics.Stages | None = None,
+    ) -> PasswordStrengthInfo:
+        # Imported here: zxcvbn builds its frequency-list dicts on import,
+        # which only the processes running analyses need to pay for
+        from zxcvbn import zxcvbn
 
+        stages = stages or metrics.NO_STAGES
+        with cls._zxcvbn_lock:
+            cls.load_dictionaries()
+            result = zxcvbn(
+                password, user_inputs=list(user_inputs), max_length=MAX_ANALYZE_LENGTH
+            )
+        stages.lap("zxcvbn")
+        info = cls._strength_info(result)
+        stages.lap("result")
+        return info
+
+    @classmethod
+    def approximate_strength(cls, password: str) -> PasswordStrengthInfo:
+        """
+        Cheap stand-in for zxcvbn, used when it cannot answer in time
+
+        Counts every distinct character as one brute-force digit (zxcvbn's
+        own brute-force cardinality is 10), so repeated characters don't
+        inflate the estimate. Dictionary words and keyboard patterns go
+        unnoticed, hence the ``approximate`` flag. Scores, crack times and
+        feedback follow zxcvbn's tables without importing it, since this runs
+        in the API process exactly when zxcvbn is too slow.
+        """
+        guesses = 10 ** len(set(password))
+        return cls._strength_info(
+            {
+                "score": sum(guesses >= threshold for threshold in SCORE_THRESHOLDS),
+                "guesses": guesses,
+                "guesses_log10": math.log10(guesses),
+                "crack_times_display": {
+                    scenario: cls._display_time(guesses / rate)
+                    for scenario, rate in ATTACK_RATES.items()
+                },
+                "feedback": APPROXIMATE_FEEDBACK,
+            },
+            approximate=True,
+        )
+
+    @staticmethod
+    def _display_time(seconds: Fraction) -> str:
+        """zxcvbn's crack time wording, e.g. '3 hours' or 'centuries'"""
+        if seconds < 1:
+            return "less than a second"
+        if seconds >= CENTURY:
+            return "centuries"
+        unit, unit_seconds = next(
+            (unit, unit_seconds)
+            for unit, unit_seconds in TIME_UNITS
+            if seconds >= unit_seconds
+        )
+        count = round(seconds / unit_seconds)
+        return f"{count} {unit}" + ("s" if count != 1 else "")
+
+    @classmethod
+    async def estimate_strength(
+        cls, password: str, user_inputs: Sequence[str] = ()
+    ) -> PasswordStrengthInfo:
+        """
+        Run zxcvbn in the password pool within the configured time budget
+
+        Long inputs can keep zxcvbn busy for hundreds of milliseconds. When
+        the budget runs out, or the pool is full, the approximate estimate
+        is returned instead; an analysis that already started finishes in
+        the background and its result still goes into the cache. Only exact
+        analyses are cached. ``user_inputs`` (names, emails, ...) are matched
+        as an extra dictionary, like zxcvbn's own argument.
+        """
+        cache_key = None
+        if settings.password_cache.enabled:
+            cache_key = cls._cache_key(password, user_inputs)
+            cached = cls.strength_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        task = asyncio.ensure_future(
+            cls.pool.run(analyze_password, password, tuple(user_inputs))
+        )
+        # Also records and caches analyses that finish after the budget ran out
+        task.add_done_callback(
+            lambda task: task.cancelled()
+            or task.exception()
+            or cls._analysis_done(cache_key, *task.result())
+        )
+        done, _ = await asyncio.wait(
+            {task}, timeout=settings.password_analysis.time_budget
+        )
+
+        if task in done:
+            try:
+                return task.result()[0]
+            except ServiceError as exc:
+                if exc.status_code != 503:
+                    raise
+                logger.warning("Password pool unavailable, approximating strength")
+        else:
+            logger.info("zxcvbn exceeded its time budget, approximating strength")
+
+        return cls.approximate_strength(password)
+
+    @classmethod
+    def _analysis_done(
+        cls,
+        cache_key: bytes | None,
+        info: PasswordStrengthInfo,
+        durations: dict[str, float],
+    ) -> None:
+        metrics.observe_stages("password_analyze", durations)
+        if cache_key:
+            cls.strength_cache.set(cache_key, info)
+
+    @classmethod
+    def _cache_key(cls, password: str, user_inputs: Sequence[str] = ()) -> bytes:
+        message = (
+            json.dumps([password, *user_inputs]).encode()
+            if user_inputs
+            else password.encode()
+        )
+        return hmac.digest(cls._cache_secret, message, hashlib.sha256)
+
+    @classmethod
+    def _strength_info(
+        cls, result: dict, approximate: bool = False
+    ) -> PasswordStrengthInfo:
         crack_times = CrackTimes(
             offline_fast_hashing=result["crack_times_display"][
                 "offline_fast_hashing_1e10_per_second"
@@ -77,10 +381,11 @@ class PasswordGeneratorService:
             guesses_log10=result["guesses_log10"],
             crack_times=crack_times,
             feedback=feedback,
+            approximate=approximate,
         )
 
     @classmethod
-    def generate_password(
+    async def generate_password(
         cls,
         length: int,
         uppercase: bool = True,
@@ -89,19 +394,363 @@ class PasswordGeneratorService:
         symbols: bool = True,
         similar: bool = True,
     ) -> dict:
-        charset = cls._build_charset(uppercase, lowercase, numbers, symbols, similar)
+        charset = cls._charset_or_error(uppercase, lowercase, numbers, symbols, similar)
 
-        if not charset:
+        password = cls.random_passwords(charset, length, 1)[0]
+        strength = await cls.estimate_strength(password)
+
+        return {
+            "password": password,
+            "strength": strength,
+        }
+
+    @classmethod
+    def generate_password_batch(
+        cls,
+        count: int,
+        length: int,
+        uppercase: bool = True,
+        lowercase: bool = True,
+        numbers: bool = True,
+        symbols: bool = True,
+        similar: bool = True,
+        analyze: PasswordAnalyzeMode = PasswordAnalyzeMode.none,
+        sample_size: int = 10,
+    ) -> AsyncIterator[dict]:
+        """
+        Generate many passwords, yielding them in order
+
+        Every password carries the closed-form ``entropy_bits`` of the
+        charset and length, which is exact for uniformly random passwords.
+        zxcvbn only runs where asked: never, on the first ``sample_size``
+        passwords, or on all of them. Options are validated eagerly so
+        errors surface before streaming starts.
+        """
+        max_count = settings.password_batch.max_count
+        if count > max_count:
             raise ServiceError(
-                code="invalid_character_types",
-                message="At least one character type must be enabled",
+                code="batch_too_large",
+                message=f"A batch may contain at most {max_count} passwords",
                 status_code=400,
+                context={"max_count": max_count},
             )
 
-        password = "".join(secrets.choice(charset) for _ in range(length))
-        strength = cls.analyze_strength(password)
+        charset = cls._charset_or_error(uppercase, lowercase, numbers, symbols, similar)
 
-        return {
-            "password": password,
-            "strength": strength,
+        analyze = getattr(analyze, "value", analyze)
+        if analyze == "all":
+            analyzed = count
+        elif analyze == "sample":
+            analyzed = min(sample_size, count)
+        else:
+            analyzed = 0
+
+        logger.info(f"Generating batch of {count} passwords")
+
+        return cls._iter_batch(
+            count, charset, length, analyzed, cls.entropy_bits(charset, length)
+        )
+
+    @classmethod
+    async def _iter_batch(
+        cls, count: int, charset: str, length: int, analyzed: int, entropy: float
+    ) -> AsyncIterator[dict]:
+        chunk_size = settings.password_batch.chunk_size
+        in_flight: deque[tuple[range, asyncio.Future]] = deque()
+
+        try:
+            for start in range(0, count, chunk_size):
+                chunk = range(start, min(start + chunk_size, count))
+                in_flight.append(
+                    (
+                        chunk,
+                        asyncio.ensure_future(
+                            cls.pool.run(
+                                generate_password_chunk,
+                                chunk.start,
+                                len(chunk),
+                                charset,
+                                length,
+                                analyzed,
+                                entropy,
+                            )
+                        ),
+                    )
+                )
+                if len(in_flight) >= cls.pool.workers:
+                    for result in await cls._collect_chunk(*in_flight.popleft()):
+                        yield result
+
+            while in_flight:
+                for result in await cls._collect_chunk(*in_flight.popleft()):
+                    yield result
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+    @staticmethod
+    async def _collect_chunk(chunk: range, task: asyncio.Future) -> list[dict]:
+        try:
+            return await task
+        except ServiceError as exc:
+            error = {"code": exc.code, "message": exc.message}
+            return [{"index": index, "error": error} for index in chunk]
+
+    @classmethod
+    def _generate_chunk(
+        cls,
+        start: int,
+        count: int,
+        charset: str,
+        length: int,
+        analyzed: int,
+        entropy: float,
+    ) -> list[dict]:
+        results = []
+        passwords = cls.random_passwords(charset, length, count)
+        for index, password in enumerate(passwords, start):
+            result = {"index": index, "password": password, "entropy_bits": entropy}
+            if index < analyzed:
+                result["strength"] = cls.analyze_strength(password).model_dump(
+                    mode="json"
+                )
+            results.append(result)
+        return results
+
+    @classmethod
+    def analyze_password_batch(
+        cls, body: AsyncIterator[bytes], ndjson: bool = False
+    ) -> AsyncIterator[dict]:
+        """
+        Score a streamed list of passwords, yielding results in input order
+
+        ``body`` is read incrementally as results are consumed, one password
+        per line: the raw text, or with ``ndjson`` a JSON string or an object
+        with a ``password`` field. Each non-blank line yields ``index`` (its
+        0-based line number) and either ``strength`` or ``error``; passwords
+        themselves are never echoed back. The last item is a ``summary``
+        with a histogram of strength buckets.
+        """
+        logger.info("Starting batch password analysis")
+        return cls._iter_analysis(cls._iter_entries(body, ndjson))
+
+    @staticmethod
+    async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Split a byte stream into lines without buffering more than one line
+
+        Lines over ``MAX_AUDIT_LINE_BYTES`` are cut one byte past the limit
+        and the rest is skipped, so a body without newlines can't grow the
+        buffer; the caller sees the overlong line and rejects it.
+        """
+        buffer = bytearray()
+        skipping = False
+        async for chunk in body:
+            start = 0
+            while (end := chunk.find(b"\n", start)) != -1:
+                if not skipping:
+                    buffer += chunk[start:end]
+                    yield bytes(buffer[: MAX_AUDIT_LINE_BYTES + 1])
+                buffer.clear()
+                skipping = False
+                start = end + 1
+            if not skipping:
+                buffer += chunk[start:]
+                if len(buffer) > MAX_AUDIT_LINE_BYTES:
+                    del buffer[MAX_AUDIT_LINE_BYTES + 1 :]
+                    yield bytes(buffer)
+                    buffer.clear()
+                    skipping = True
+        if buffer and not skipping:
+            yield bytes(buffer)
+
+    @classmethod
+    async def _iter_entries(
+        cls, body: AsyncIterator[bytes], ndjson: bool
+    ) -> AsyncIterator[tuple[int, str | dict]]:
+        """``(index, password)`` per non-blank line, or ``(index, error)``"""
+        index = -1
+        async for line in cls._iter_lines(body):
+            index += 1
+            line = line.removesuffix(b"\r")
+            if not line.strip():
+                continue
+            if len(line) > MAX_AUDIT_LINE_BYTES:
+                yield index, {
+                    "code": "line_too_long",
+                    "message": f"Lines may be at most {MAX_AUDIT_LINE_BYTES} bytes",
+                }
+                continue
+
+            try:
+                if ndjson:
+                    entry = json.loads(line)
+                    password = (
+                        entry.get("password") if isinstance(entry, dict) else entry
+                    )
+                    if not isinstance(password, str):
+                        raise ValueError("no password string")
+                else:
+                    password = line.decode()
+            except ValueError:
+                yield index, {
+                    "code": "invalid_entry",
+                    "message": (
+                        "Expected a JSON string or an object with a password field"
+                        if ndjson
+                        else "Line is not valid UTF-8"
+                    ),
+                }
+                continue
+
+            if len(password) > MAX_ANALYZE_LENGTH:
+                yield index, {
+                    "code": "password_too_long",
+                    "message": (
+                        f"Passwords may be at most {MAX_ANALYZE_LENGTH} characters"
+                    ),
+                }
+                continue
+            yield index, password
+
+    @classmethod
+    async def _iter_analysis(
+        cls, entries: AsyncIterator[tuple[int, str | dict]]
+    ) -> AsyncIterator[dict]:
+        chunk_size = settings.password_batch.analyze_chunk_size
+        in_flight: deque[tuple[list[tuple[int, str | dict]], asyncio.Future]] = deque()
+        histogram = dict.fromkeys((strength.value for strength in PasswordStrength), 0)
+        errors = 0
+
+        def tally(results: list[dict]) -> list[dict]:
+            nonlocal errors
+            for result in results:
+                if "error" in result:
+                    errors += 1
+                else:
+                    histogram[result["strength"]["strength"]] += 1
+            return results
+
+        try:
+            async for chunk in cls._iter_chunks(entries, chunk_size):
+                in_flight.append(
+                    (chunk, asyncio.ensure_future(cls._analyze_chunk(chunk)))
+                )
+                if len(in_flight) >= cls.pool.workers:
+                    for result in tally(
+                        await cls._collect_analysis(*in_flight.popleft())
+                    ):
+                        yield result
+
+            while in_flight:
+                for result in tally(await cls._collect_analysis(*in_flight.popleft())):
+                    yield result
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+        yield {
+            "summary": {
+                "total": sum(histogram.values()) + errors,
+                "analyzed": sum(histogram.values()),
+                "errors": errors,
+                "histogram": histogram,
+            }
         }
+
+    @staticmethod
+    async def _iter_chunks(
+        entries: AsyncIterator[tuple[int, str | dict]], size: int
+    ) -> AsyncIterator[list[tuple[int, str | dict]]]:
+        chunk = []
+        async for entry in entries:
+            chunk.append(entry)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @classmethod
+    async def _analyze_chunk(cls, chunk: list[tuple[int, str | dict]]) -> list[dict]:
+        """
+        Analyze one chunk in the pool, skipping passwords already cached
+
+        Results land in the strength cache, so lists with many repeated
+        (and typically weak) passwords only pay for zxcvbn once each.
+        """
+        use_cache = settings.password_cache.enabled
+        strengths: dict[int, dict] = {}
+        missing: list[tuple[int, str]] = []
+        for position, (_, entry) in enumerate(chunk):
+            if isinstance(entry, dict):
+                continue
+            cached = (
+                cls.strength_cache.get(cls._cache_key(entry)) if use_cache else None
+            )
+            if cached is not None:
+                strengths[position] = cached.model_dump(mode="json")
+            else:
+                missing.append((position, entry))
+
+        if missing:
+            analyzed = await cls.pool.run(
+                analyze_password_chunk, [password for _, password in missing]
+            )
+            for (position, password), (info, durations) in zip(missing, analyzed):
+                cls._analysis_done(
+                    cls._cache_key(password) if use_cache else None, info, durations
+                )
+                strengths[position] = info.model_dump(mode="json")
+
+        return [
+            (
+                {"index": index, "error": entry}
+                if isinstance(entry, dict)
+                else {"index": index, "strength": strengths[position]}
+            )
+            for position, (index, entry) in enumerate(chunk)
+        ]
+
+    @staticmethod
+    async def _collect_analysis(
+        chunk: list[tuple[int, str | dict]], task: asyncio.Future
+    ) -> list[dict]:
+        try:
+            return await task
+        except ServiceError as exc:
+            error = {"code": exc.code, "message": exc.message}
+            return [{"index": index, "error": error} for index, _ in chunk]
+
+
+def generate_password_chunk(
+    start: int, count: int, charset: str, length: int, analyzed: int, entropy: float
+) -> list[dict]:
+    """Worker entry point for one chunk of a password batch"""
+    return PasswordGeneratorService._generate_chunk(
+        start, count, charset, length, analyzed, entropy
+    )
+
+
+def analyze_password(
+    password: str, user_inputs: Sequence[str] = ()
+) -> tuple[PasswordStrengthInfo, dict[str, float]]:
+    """Worker entry point for one zxcvbn analysis, with its stage timings"""
+    stages = metrics.stages()
+    info = PasswordGeneratorService.analyze_strength(password, user_inputs, stages)
+    return info, stages.durations
+
+
+def analyze_password_chunk(
+    passwords: list[str],
+) -> list[tuple[PasswordStrengthInfo, dict[str, float]]]:
+    """Worker entry point for one chunk of a batch analysis"""
+    return [analyze_password(password) for password in passwords]
+
+
+def warm_up_worker() -> None:
+    """
+    Password pool initializer: score a sample password, which imports zxcvbn
+    and maps the custom dictionaries before the first request needs them
+    """
+    PasswordGeneratorService.analyze_strength("Tr0ub4dor&3")
@@ -0,0 +1,197 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from collections.abc import Iterator
+from pathlib import Path
+
+# Magic, byte order, format version, max_length the index was compiled
+# with, entries, hash slots, longest word in characters
+HEADER = struct.Struct("<8s1sxxxIIIII")
+MAGIC = b"ARTRANKD"
+FORMAT_VERSION = 2
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+class RankedIndex:
+    """
+    Read-only ranked dictionary backed by a memory-mapped index file
+
+    Stands in for the ``{word: rank}`` dicts zxcvbn builds from its frequency
+    lists: ``in`` and ``[]`` are all its matchers use. Lookups hash the word
+    into an open-addressing table inside the file, so nothing is loaded up
+    front and every process mapping the same file shares its pages through
+    the OS page cache, however many words it holds.
+
+    File layout after the header (native byte order): ``slots`` uint32 hash
+    slots holding 1-based entry numbers (0 marks an empty slot),
+    ``entries + 1`` uint64 offsets into the word data, then the lowercased
+    UTF-8 words back to back. A word's rank is its entry number.
+    """
+
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            byte_order,
+            version,
+            self.max_length,
+            self.entries,
+            slots,
+            self.longest,
+        ) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or byte_order != BYTE_ORDER or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a ranked dictionary index")
+
+        view = memoryview(self._mmap)
+        slots_end = HEADER.size + 4 * slots
+        offsets_end = slots_end + 8 * (self.entries + 1)
+        self._slots = view[HEADER.size : slots_end].cast("I")
+        self._offsets = view[slots_end:offsets_end].cast("Q")
+        self._words = view[offsets_end:]
+        self._mask = slots - 1
+
+    def rank(self, word: str) -> int:
+        """Rank of ``word`` (already lowercased), 0 when it is not listed"""
+        if len(word) > self.longest:
+            return 0
+        key = word.encode()
+        offsets = self._offsets
+        slot = zlib.crc32(key) & self._mask
+        while entry := self._slots[slot]:
+            if self._words[offsets[entry - 1] : offsets[entry]] == key:
+                return entry
+            slot = (slot + 1) & self._mask
+        return 0
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.rank(word) != 0
+
+    def __getitem__(self, word: str) -> int:
+        rank = self.rank(word)
+        if not rank:
+            raise KeyError(word)
+        return rank
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def info(self) -> dict:
+        return {
+            "name": self.name,
+            "entries": self.entries,
+            "bytes": len(self._mmap),
+            "index": str(self.path),
+        }
+
+
+def _read_words(source: Path) -> Iterator[str]:
+    """Lowercased, stripped, non-empty lines of a word list"""
+    with open(source, encoding="utf-8", errors="replace") as file:
+        for line in file:
+            word = line.strip().lower()
+            if word:
+                yield word
+
+
+def compile_index(source: Path, target: Path, max_length: int) -> None:
+    """
+    Compile a word list (most common first) into a ``RankedIndex`` file
+
+    Words longer than ``max_length`` can never be part of an analyzed
+    password and are left out; for repeated words the first (lowest) rank
+    wins. Memory use is about the size of the word data plus 16 bytes per
+    word, far below a dict of the same words, and the file is replaced
+    atomically so processes starting concurrently never see a partial index.
+    """
+    lines = sum(1 for _ in _read_words(source))
+    slot_count = 1 << max(4, (2 * lines - 1).bit_length())
+    mask = slot_count - 1
+    slots = array("I", bytes(4 * slot_count))
+    offsets = array("Q", [0])
+    words = bytearray()
+    longest = 0
+
+    for word in _read_words(source):
+        if len(word) > max_length:
+            continue
+        key = word.encode()
+        slot = zlib.crc32(key) & mask
+        while entry := slots[slot]:
+            if words[offsets[entry - 1] : offsets[entry]] == key:
+                break
+            slot = (slot + 1) & mask
+        else:
+            words += key
+            offsets.append(len(words))
+            slots[slot] = len(offsets) - 1
+            longest = max(longest, len(word))
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC,
+                    BYTE_ORDER,
+                    FORMAT_VERSION,
+                    max_length,
+                    len(offsets) - 1,
+                    slot_count,
+                    longest,
+                )
+            )
+            slots.tofile(file)
+            offsets.tofile(file)
+            file.write(words)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _index_is_current(target: Path, source: Path, max_length: int) -> bool:
+    """Whether ``target`` is newer than ``source`` and matches format and limit"""
+    try:
+        if target.stat().st_mtime_ns < source.stat().st_mtime_ns:
+            return False
+        with open(target, "rb") as file:
+            header = file.read(HEADER.size)
+    except FileNotFoundError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, byte_order, version, limit, *_ = HEADER.unpack(header)
+    return (magic, byte_order, version, limit) == (
+        MAGIC,
+        BYTE_ORDER,
+        FORMAT_VERSION,
+        max_length,
+    )
+
+
+def load_index(source: Path, index_dir: Path, max_length: int) -> RankedIndex:
+    """
+    Map the index for ``source``, compiling it first when missing or stale
+
+    The index lives in ``index_dir`` under the word list's name plus a hash
+    of its resolved path, so lists sharing a file name in different
+    directories keep separate indexes. It is rebuilt whenever the word list
+    is newer than it, or it was compiled by another format version or with
+    another ``max_length``.
+    """
+    digest = hashlib.sha256(str(source.resolve()).encode()).hexdigest()[:16]
+    target = index_dir / f"{source.stem}-{digest}.rdx"
+    if not _index_is_current(target, source, max_length):
+        compile_index(source, target, max_length)
+    return RankedIndex(source.stem, target)
@@ -0,0 +1,152 @@
+from abc import ABC, abstractmethod
+from array import array
+
+from PIL import Image, ImageMath
+from qrcode.image.styles import colormasks
+
+
+def _float_strip(values: list[float], vertical: bool = False) -> Image.Image:
+    size = (1, len(values)) if vertical else (len(values), 1)
+    return Image.frombytes("F", size, array("f", values).tobytes())
+
+
+class WholeImageColorMask(colormasks.QRColorMask, ABC):
+    """
+    Color mask applied with whole-image Pillow operations
+
+    Produces the same result as ``QRColorMask.apply_mask`` without a Python
+    loop over pixels: the blend weight of every pixel (how far it sits
+    between the background and the paint color) is recovered with a single
+    color-matrix conversion, and the foreground is pasted through it onto a
+    plain background. Subclasses only provide the foreground field.
+
+    Transparent backgrounds fall back to the per-pixel implementation.
+    """
+
+    @abstractmethod
+    def foreground(self, image: Image.Image) -> Image.Image | tuple:
+        """Paint color of every pixel: an RGB image, or one color for all"""
+
+    def apply_mask(self, image, use_cache=False):
+        if self.has_transparency:
+            return super().apply_mask(image)
+
+        weights = self.blend_weights(image)
+        foreground = self.foreground(image)
+
+        box = (0, 0, *image.size)
+        image.paste(self.back_color, box)
+        image.paste(foreground, box, weights)
+
+    def blend_weights(self, image: Image.Image) -> Image.Image:
+        """Per-pixel interpolation weight as an L image (0 = back, 255 = paint)"""
+        channels = [
+            (back, paint)
+            for back, paint in zip(self.back_color[:3], self.paint_color[:3])
+            if back != paint
+        ]
+        if not channels:
+            # QRColorMask paints every pixel with the background here
+            return Image.new("L", image.size, 0)
+
+        # Mean over channels of (pixel - back) / (paint - back), scaled to 255
+        matrix = []
+        offset = 0.0
+        for back, paint in zip(self.back_color[:3], self.paint_color[:3]):
+            if back == paint:
+                matrix.append(0.0)
+                continue
+            scale = 255 / (len(channels) * (paint - back))
+            matrix.append(scale)
+            offset -= scale * back
+
+        rgb = image if image.mode == "RGB" else image.convert("RGB")
+        return rgb.convert("L", (*matrix, offset))
+
+    def gradient_field(
+        self, distance: Image.Image, start: tuple, end: tuple
+    ) -> Image.Image:
+        """Map a 0..1 float field onto RGB, truncating like ``interp_num``"""
+        bands = [
+            distance.point(lambda d, s=s, e=e: d * (e - s) + s).convert("L")
+            for s, e in zip(start[:3], end[:3])
+        ]
+        return Image.merge("RGB", bands)
+
+    def strip_field(
+        self, image: Image.Image, start: tuple, end: tuple, vertical: bool
+    ) -> Image.Image:
+        """Linear gradient built from one exact row/column, stretched"""
+        width, height = image.size
+        length = height if vertical else width
+        colors = bytes(
+            channel
+            for i in range(length)
+            for channel in self.interp_color(start[:3], end[:3], i / width)
+        )
+        strip = Image.frombytes("RGB", (1, length) if vertical else (length, 1), colors)
+        return strip.resize(image.size, Image.Resampling.NEAREST)
+
+
+class SolidColorMask(WholeImageColorMask, colormasks.SolidFillColorMask):
+    def apply_mask(self, image, use_cache=False):
+        if self.back_color == (255, 255, 255) and self.front_color == (0, 0, 0):
+            # The drawers already paint black on white
+            return
+        super().apply_mask(image)
+
+    def foreground(self, image):
+        return self.front_color
+
+
+class RadialGradientColorMask(WholeImageColorMask, colormasks.RadialGradiantColorMask):
+    def foreground(self, image):
+        width, height = image.size
+        half = width / 2
+        dx2 = _float_strip([(x - half) ** 2 for x in range(width)])
+        dy2 = _float_strip([(y - half) ** 2 for y in range(height)], vertical=True)
+        distance = ImageMath.lambda_eval(
+            lambda args: (args["dx2"] + args["dy2"]) ** 0.5 / (2**0.5 * half),
+            dx2=dx2.resize(image.size, Image.Resampling.NEAREST),
+            dy2=dy2.resize(image.size, Image.Resampling.NEAREST),
+        )
+        return self.gradient_field(distance, self.center_color, self.edge_color)
+
+
+class SquareGradientColorMask(WholeImageColorMask, colormasks.SquareGradiantColorMask):
+    def foreground(self, image):
+        width, height = image.size
+        half = width / 2
+        dx = _float_strip([abs(x - half) for x in range(width)])
+        dy = _float_strip([abs(y - half) for y in range(height)], vertical=True)
+        distance = ImageMath.lambda_eval(
+            lambda args: args["max"](args["dx"], args["dy"]) / half,
+            dx=dx.resize(image.size, Image.Resampling.NEAREST),
+            dy=dy.resize(image.size, Image.Resampling.NEAREST),
+        )
+        return self.gradient_field(distance, self.center_color, self.edge_color)
+
+
+class HorizontalGradientColorMask(
+    WholeImageColorMask, colormasks.HorizontalGradiantColorMask
+):
+    def foreground(self, image):
+        return self.strip_field(
+            image, self.left_color, self.right_color, vertical=False
+        )
+
+
+class VerticalGradientColorMask(
+    WholeImageColorMask, colormasks.VerticalGradiantColorMask
+):
+    def foreground(self, image):
+        return self.strip_field(image, self.top_color, self.bottom_color, vertical=True)
+
+
+class ImagePatternColorMask(WholeImageColorMask, colormasks.ImageColorMask):
+    def foreground(self, image):
+        # Only the color channels are used, as in ImageColorMask, which also
+        # makes L and P mask images work
+        if self.color_img.mode != "RGB":
+            return self.color_img.convert("RGB")
+        return self.color_img
@@ -1,62 +1,94 @@
+import asyncio
 import base64
 import binascii
+import copy
+import hashlib
 import io
+import json
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
 from decimal import Decimal
 from logging import getLogger
-from pathlib import Path
-from uuid import uuid4
-
-import qrcode.image.svg
-from PIL import Image, UnidentifiedImageError
-from qrcode import (
-    ERROR_CORRECT_H,
-    ERROR_CORRECT_L,
-    ERROR_CORRECT_M,
-    ERROR_CORRECT_Q,
-    QRCode,
-)
-from qrcode.image.styledpil import StyledPilImage
-from qrcode.image.styles.colormasks import (
-    HorizontalGradiantColorMask,
-    ImageColorMask,
-    RadialGradiantColorMask,
-    SolidFillColorMask,
-    SquareGradiantColorMask,
-    VerticalGradiantColorMask,
-)
-from qrcode.image.styles.moduledrawers.pil import (
-    CircleModuleDrawer,
-    GappedSquareModuleDrawer,
-    HorizontalBarsDrawer,
-    RoundedModuleDrawer,
-    SquareModuleDrawer,
-    VerticalBarsDrawer,
-)
+from typing import TYPE_CHECKING
 
+from core import metrics
+from core.config import settings
 from schemas.qr_generator import (
     ColorMaskConfig,
     EyeDrawerConfig,
     ModuleDrawerConfig,
 )
 
+from .cache import LRUCache
 from .exceptions import ServiceError
+from .singleflight import SingleFlight
+from .workers import WorkerPool
+
+# Pillow, qrcode and the modules built on them are imported where they are
+# used, so the API process and export_openapi.py never load them
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from .qr_matrix import QRMatrix
 
 logger = getLogger(__name__)
 
+RASTER_FORMATS = ("png", "webp")
 
-class QRCodeGeneratorService:
-    ERROR_CORRECTION_MAP = {
-        "L": ERROR_CORRECT_L,
-        "M": ERROR_CORRECT_M,
-        "Q": ERROR_CORRECT_Q,
-        "H": ERROR_CORRECT_H,
-    }
 
-    TEMP_DIR = Path(__file__).parent.parent / "temp" / "qr" / "generate"
+def _sprites_size(sprites: dict) -> int:
+    from .qr_image import sprites_size
+
+    return sprites_size(sprites)
+
+
+class QRCodeGeneratorService:
+    # qrcode.constants.ERROR_CORRECT_*, the format-information bits of each level
+    ERROR_CORRECTION_MAP = {"L": 1, "M": 0, "Q": 3, "H": 2}
+
+    render_cache = LRUCache(
+        max_entries=settings.qr_cache.max_entries,
+        max_bytes=settings.qr_cache.max_bytes,
+        max_entry_bytes=settings.qr_cache.max_entry_bytes,
+        ttl=settings.qr_cache.ttl,
+        sizeof=lambda result: len(result["image"]),
+    )
+
+    # Decoded logos and their resized copies, per worker process
+    logo_cache = LRUCache(
+        max_entries=settings.qr_logo_cache.max_entries,
+        max_bytes=settings.qr_logo_cache.max_bytes,
+        max_entry_bytes=settings.qr_logo_cache.max_entry_bytes,
+        ttl=settings.qr_logo_cache.ttl,
+        sizeof=lambda image: image.width * image.height * len(image.getbands()),
+    )
+
+    # Pre-rasterized module shapes per drawer, box size and colors
+    sprite_cache = LRUCache(
+        max_entries=settings.qr_sprite_cache.max_entries,
+        max_bytes=settings.qr_sprite_cache.max_bytes,
+        max_entry_bytes=settings.qr_sprite_cache.max_entry_bytes,
+        ttl=settings.qr_sprite_cache.ttl,
+        sizeof=_sprites_size,
+    )
+
+    # Encoded module matrices per (data, version, error correction)
+    matrix_cache = LRUCache(
+        max_entries=settings.qr_matrix_cache.max_entries,
+        max_bytes=settings.qr_matrix_cache.max_bytes,
+        max_entry_bytes=settings.qr_matrix_cache.max_entry_bytes,
+        ttl=settings.qr_matrix_cache.ttl,
+        sizeof=lambda matrix: len(matrix.bits),
+    )
+
+    render_pool = WorkerPool("qr_render", settings.qr_render)
+    render_flight = SingleFlight("qr_render", settings.single_flight.enabled)
 
     @classmethod
-    def _ensure_temp_dir(cls):
-        cls.TEMP_DIR.mkdir(exist_ok=True, parents=True)
+    async def warm_up(cls) -> None:
+        """Start the render workers, each rendering a sample code once"""
+        await cls.render_pool.start(warm_up_worker)
 
     @staticmethod
     def _hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
@@ -71,6 +103,15 @@ class QRCodeGeneratorService:
 
     @staticmethod
     def _get_module_drawer(config: ModuleDrawerConfig | None):
+        from qrcode.image.styles.moduledrawers.pil import (
+            CircleModuleDrawer,
+            GappedSquareModuleDrawer,
+            HorizontalBarsDrawer,
+            RoundedModuleDrawer,
+            SquareModuleDrawer,
+            VerticalBarsDrawer,
+        )
+
         if not config:
             return SquareModuleDrawer()
 
@@ -96,6 +137,12 @@ class QRCodeGeneratorService:
 
     @staticmethod
     def _get_eye_drawer(config: EyeDrawerConfig | None):
+        from qrcode.image.styles.moduledrawers.pil import (
+            CircleModuleDrawer,
+            RoundedModuleDrawer,
+            SquareModuleDrawer,
+        )
+
         if not config:
             return None
 
@@ -112,6 +159,17 @@ class QRCodeGeneratorService:
     @classmethod
     def _get_color_mask(cls, config: ColorMaskConfig | None):
         """Create color mask from config"""
+        from PIL import Image
+
+        from .qr_color_masks import (
+            HorizontalGradientColorMask,
+            ImagePatternColorMask,
+            RadialGradientColorMask,
+            SolidColorMask,
+            SquareGradientColorMask,
+            VerticalGradientColorMask,
+        )
+
         if not config:
             return None
 
@@ -123,7 +181,7 @@ class QRCodeGeneratorService:
             front_color = (
                 cls._hex_to_rgb(config.front_color) if config.front_color else (0, 0, 0)
             )
-            return SolidFillColorMask(back_color=back_color, front_color=front_color)
+            return SolidColorMask(back_color=back_color, front_color=front_color)
 
         elif config.type == "radial_gradient":
             center_color = (
@@ -134,7 +192,7 @@ class QRCodeGeneratorService:
             edge_color = (
                 cls._hex_to_rgb(config.edge_color) if config.edge_color else (0, 0, 255)
             )
-            return RadialGradiantColorMask(
+            return RadialGradientColorMask(
                 back_color=back_color, center_color=center_color, edge_color=edge_color
             )
 
@@ -147,7 +205,7 @@ class QRCodeGeneratorService:
             edge_color = (
                 cls._hex_to_rgb(config.edge_color) if config.edge_color else (0, 0, 255)
             )
-            return SquareGradiantColorMask(
+            return SquareGradientColorMask(
                 back_color=back_color, center_color=center_color, edge_color=edge_color
             )
 
@@ -160,7 +218,7 @@ class QRCodeGeneratorService:
                 if config.right_color
                 else (0, 0, 255)
             )
-            return HorizontalGradiantColorMask(
+            return HorizontalGradientColorMask(
                 back_color=back_color, left_color=left_color, right_color=right_color
             )
 
@@ -173,13 +231,11 @@ class QRCodeGeneratorService:
                 if config.bottom_color
                 else (0, 0, 255)
             )
-            return VerticalGradiantColorMask(
+            return VerticalGradientColorMask(
                 back_color=back_color, top_color=top_color, bottom_color=bottom_color
             )
 
         elif config.type == "image" and config.color_mask_image:
-            cls._ensure_temp_dir()
-
             if back_color == (0, 0, 0):
                 raise ServiceError(
                     code="invalid_color_combination",
@@ -194,19 +250,23 @@ class QRCodeGeneratorService:
                     else config.color_mask_image
                 )
                 image = Image.open(io.BytesIO(image_bytes))
-            except (binascii.Error, UnidentifiedImageError) as exc:
+                image.load()
+            except (binascii.Error, OSError) as exc:
                 raise ServiceError(
                     code="invalid_color_mask_image",
                     message="Invalid color_mask_image data",
                     status_code=400,
                 ) from exc
-            return ImageColorMask(back_color=back_color, color_mask_image=image)
+            return ImagePatternColorMask(back_color=back_color, color_mask_image=image)
 
         return None
 
-    @classmethod
-    async def generate_qr(
-        cls,
+    @staticmethod
+    def _digest(value: str) -> str:
+        return hashlib.sha256(value.encode()).hexdigest()
+
+    @staticmethod
+    def _dump_params(
         data: str,
         version: int | None,
         box_size: int,
@@ -214,6 +274,7 @@ class QRCodeGeneratorService:
         error_correction: str,
         output_format: str,
         final_size: int | None,
+        sizing: str,
         fill_color: str | None,
         back_color: str | None,
         use_styled_image: bool,
@@ -222,6 +283,57 @@ class QRCodeGeneratorService:
         color_mask: ColorMaskConfig | None,
         embedded_image: str | None,
     ) -> dict:
+        """Flatten request options into picklable, JSON-safe primitives"""
+        return {
+            "data": data,
+            "version": version,
+            "box_size": box_size,
+            "border": border,
+            "error_correction": getattr(error_correction, "value", error_correction),
+            "output_format": getattr(output_format, "value", output_format),
+            "final_size": final_size,
+            "sizing": getattr(sizing, "value", sizing),
+            "fill_color": fill_color.lower() if fill_color else None,
+            "back_color": back_color.lower() if back_color else None,
+            "use_styled_image": use_styled_image,
+            "module_drawer": (
+                module_drawer.model_dump(mode="json") if module_drawer else None
+            ),
+            "eye_drawer": eye_drawer.model_dump(mode="json") if eye_drawer else None,
+            "color_mask": color_mask.model_dump(mode="json") if color_mask else None,
+            "embedded_image": embedded_image,
+        }
+
+    @classmethod
+    def _params_key(cls, params: dict) -> str:
+        canonical_params = dict(params)
+        if params["color_mask"] and params["color_mask"]["color_mask_image"]:
+            canonical_params["color_mask"] = {
+                **params["color_mask"],
+                "color_mask_image": cls._digest(
+                    params["color_mask"]["color_mask_image"]
+                ),
+            }
+        if params["embedded_image"]:
+            canonical_params["embedded_image"] = cls._digest(params["embedded_image"])
+
+        canonical = json.dumps(canonical_params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @classmethod
+    def request_key(cls, **kwargs) -> str:
+        """Canonical hash of a generation request, images replaced by digests"""
+        return cls._params_key(cls._dump_params(**kwargs))
+
+    @staticmethod
+    def _validate_options(
+        output_format: str,
+        final_size: int | None,
+        use_styled_image: bool,
+        module_drawer: ModuleDrawerConfig | None,
+        eye_drawer: EyeDrawerConfig | None,
+        color_mask: ColorMaskConfig | None,
+    ) -> None:
         if not use_styled_image and (module_drawer or eye_drawer or color_mask):
             raise ServiceError(
                 code="styled_image_required",
@@ -229,49 +341,302 @@ class QRCodeGeneratorService:
                 status_code=400,
             )
 
-        if output_format != "png" and final_size is not None:
+        if output_format not in RASTER_FORMATS and final_size is not None:
             raise ServiceError(
                 code="final_size_png_only",
-                message="final_size is only supported for PNG output",
+                message="final_size is only supported for PNG and WebP output",
                 status_code=400,
             )
 
+    @classmethod
+    async def generate_qr(
+        cls,
+        data: str,
+        version: int | None,
+        box_size: int,
+        border: int,
+        error_correction: str,
+        output_format: str,
+        final_size: int | None,
+        sizing: str,
+        fill_color: str | None,
+        back_color: str | None,
+        use_styled_image: bool,
+        module_drawer: ModuleDrawerConfig | None,
+        eye_drawer: EyeDrawerConfig | None,
+        color_mask: ColorMaskConfig | None,
+        embedded_image: str | None,
+    ) -> dict:
+        cls._validate_options(
+            output_format=output_format,
+            final_size=final_size,
+            use_styled_image=use_styled_image,
+            module_drawer=module_drawer,
+            eye_drawer=eye_drawer,
+            color_mask=color_mask,
+        )
+
+        params = cls._dump_params(
+            data=data,
+            version=version,
+            box_size=box_size,
+            border=border,
+            error_correction=error_correction,
+            output_format=output_format,
+            final_size=final_size,
+            sizing=sizing,
+            fill_color=fill_color,
+            back_color=back_color,
+            use_styled_image=use_styled_image,
+            module_drawer=module_drawer,
+            eye_drawer=eye_drawer,
+            color_mask=color_mask,
+            embedded_image=embedded_image,
+        )
+
+        cache_key = cls._params_key(params)
+        if settings.qr_cache.enabled:
+            cached = cls.render_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Serving QR code from render cache")
+                return cached
+
         logger.info(f"Generating QR code with format: {output_format}")
 
-        qr = QRCode(
+        # Identical requests arriving while this one renders share its result
+        return await cls.render_flight.run(
+            cache_key, cls._render_and_cache, cache_key, params
+        )
+
+    @classmethod
+    async def _render_and_cache(
+        cls,
+        cache_key: str,
+        params: dict,
+        is_cancelled: Callable[[], Awaitable[bool]] | None = None,
+    ) -> dict:
+        result = cls._observe(
+            await cls.render_pool.run(render_qr, params, is_cancelled=is_cancelled)
+        )
+
+        if settings.qr_cache.enabled:
+            cls.render_cache.set(cache_key, result)
+
+        return result
+
+    @classmethod
+    def generate_qr_batch(
+        cls,
+        items: list[str],
+        version: int | None,
+        box_size: int,
+        border: int,
+        error_correction: str,
+        output_format: str,
+        final_size: int | None,
+        sizing: str,
+        fill_color: str | None,
+        back_color: str | None,
+        use_styled_image: bool,
+        module_drawer: ModuleDrawerConfig | None,
+        eye_drawer: EyeDrawerConfig | None,
+        color_mask: ColorMaskConfig | None,
+        embedded_image: str | None,
+    ) -> AsyncIterator[dict]:
+        """
+        Render many payloads sharing one style, yielding results in order
+
+        Options and the shared logo and color mask image are validated
+        eagerly so errors surface before streaming starts. Payloads are
+        rendered in chunks across the render pool; each chunk builds its
+        drawers and color mask once, and at most one chunk per worker is held
+        in memory at a time.
+        """
+        if len(items) > settings.qr_batch.max_items:
+            raise ServiceError(
+                code="batch_too_large",
+                message=f"A batch may contain at most "
+                f"{settings.qr_batch.max_items} items",
+                status_code=400,
+                context={"max_items": settings.qr_batch.max_items},
+            )
+
+        cls._validate_options(
+            output_format=output_format,
+            final_size=final_size,
+            use_styled_image=use_styled_image,
+            module_drawer=module_drawer,
+            eye_drawer=eye_drawer,
+            color_mask=color_mask,
+        )
+        cls._validate_images(error_correction, color_mask, embedded_image)
+
+        options = cls._dump_params(
+            data="",
             version=version,
-            error_correction=cls.ERROR_CORRECTION_MAP[error_correction],
             box_size=box_size,
             border=border,
+            error_correction=error_correction,
+            output_format=output_format,
+            final_size=final_size,
+            sizing=sizing,
+            fill_color=fill_color,
+            back_color=back_color,
+            use_styled_image=use_styled_image,
+            module_drawer=module_drawer,
+            eye_drawer=eye_drawer,
+            color_mask=color_mask,
+            embedded_image=embedded_image,
         )
-        qr.add_data(data)
-        qr.make(fit=True)
-
-        if output_format == "ascii":
-            f = io.StringIO()
-            qr.print_ascii(out=f)
-            f.seek(0)
-            return {"image": f.read(), "format": "ascii", "size": None}
-
-        if output_format.startswith("svg"):
-            if output_format == "svg":
-                factory = qrcode.image.svg.SvgImage
-            elif output_format == "svg-path":
-                factory = qrcode.image.svg.SvgPathImage
-            else:
-                factory = qrcode.image.svg.SvgFragmentImage
+        del options["data"]
+
+        logger.info(f"Generating batch of {len(items)} QR codes")
+
+        return cls._iter_batch(items, options)
+
+    @classmethod
+    def _validate_images(
+        cls,
+        error_correction: str,
+        color_mask: ColorMaskConfig | None,
+        embedded_image: str | None,
+    ) -> None:
+        """
+        Decode a batch's shared images once, in the API process
+
+        Every chunk decodes them again in its worker, where a broken image
+        would only turn into one error line per item instead of a 400.
+        """
+        if embedded_image:
+            if error_correction != "H":
+                raise ServiceError(
+                    code="embedded_image_requires_h",
+                    message="embedded_image requires error_correction H",
+                    status_code=400,
+                )
+            cls._load_embedded_image(embedded_image, cls._digest(embedded_image))
 
-            img = qr.make_image(image_factory=factory)
-            svg_string = img.to_string(encoding="unicode")
+        if color_mask is not None and color_mask.type == "image":
+            cls._get_color_mask(color_mask)
 
-            return {"image": svg_string, "format": output_format, "size": None}
+    @classmethod
+    async def _iter_batch(cls, items: list[str], options: dict) -> AsyncIterator[dict]:
+        chunk_size = settings.qr_batch.chunk_size
+        in_flight: deque[tuple[list[tuple[int, str]], asyncio.Future]] = deque()
+
+        try:
+            for start in range(0, len(items), chunk_size):
+                chunk = list(enumerate(items[start : start + chunk_size], start))
+                in_flight.append(
+                    (
+                        chunk,
+                        asyncio.ensure_future(
+                            cls.render_pool.run(render_qr_batch, chunk, options)
+                        ),
+                    )
+                )
+                if len(in_flight) >= cls.render_pool.workers:
+                    for result in await cls._collect_chunk(*in_flight.popleft()):
+                        yield result
+
+            while in_flight:
+                for result in await cls._collect_chunk(*in_flight.popleft()):
+                    yield result
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+    @classmethod
+    async def _collect_chunk(
+        cls, chunk: list[tuple[int, str]], task: asyncio.Future
+    ) -> list[dict]:
+        try:
+            return [cls._observe(result) for result in await task]
+        except ServiceError as exc:
+            error = {"code": exc.code, "message": exc.message}
+            return [
+                {"index": index, "data": data, "error": error} for index, data in chunk
+            ]
+
+    @staticmethod
+    def _observe(result: dict) -> dict:
+        """Record a worker render's stage timings and sizes, then drop the timings"""
+        metrics.observe_stages("qr_generate", result.pop("stages", {}))
+        if "image" in result:
+            size = result["size"]
+            metrics.observe_image(
+                "qr_generate",
+                size["width"] * size["height"] if size else None,
+                result["encoding"]["bytes"],
+            )
+        return result
 
+    @classmethod
+    def _render(
+        cls,
+        data: str,
+        version: int | None,
+        box_size: int,
+        border: int,
+        error_correction: str,
+        output_format: str,
+        final_size: int | None,
+        sizing: str,
+        fill_color: str | None,
+        back_color: str | None,
+        use_styled_image: bool,
+        module_drawer: ModuleDrawerConfig | None,
+        eye_drawer: EyeDrawerConfig | None,
+        color_mask: ColorMaskConfig | None,
+        embedded_image: str | None,
+    ) -> dict:
+        make_image_kwargs = cls._build_image_kwargs(
+            output_format=output_format,
+            fill_color=fill_color,
+            back_color=back_color,
+            use_styled_image=use_styled_image,
+            module_drawer=module_drawer,
+            eye_drawer=eye_drawer,
+            color_mask=color_mask,
+            embedded_image=embedded_image,
+        )
+        return cls._render_data(
+            data=data,
+            version=version,
+            box_size=box_size,
+            border=border,
+            error_correction=error_correction,
+            output_format=output_format,
+            final_size=final_size,
+            sizing=sizing,
+            make_image_kwargs=make_image_kwargs,
+        )
+
+    @classmethod
+    def _build_image_kwargs(
+        cls,
+        output_format: str,
+        fill_color: str | None,
+        back_color: str | None,
+        use_styled_image: bool,
+        module_drawer: ModuleDrawerConfig | None,
+        eye_drawer: EyeDrawerConfig | None,
+        color_mask: ColorMaskConfig | None,
+        embedded_image: str | None,
+    ) -> dict:
+        """Build make_image() styling kwargs, reusable across renders"""
         make_image_kwargs = {}
-        image_path = None
+
+        if output_format not in RASTER_FORMATS:
+            return make_image_kwargs
 
         if use_styled_image:
+            from .qr_image import StyledQRImage
+
             logger.info("Using StyledPilImage for advanced styling")
-            make_image_kwargs["image_factory"] = StyledPilImage
+            make_image_kwargs["image_factory"] = StyledQRImage
+            if settings.qr_sprite_cache.enabled:
+                make_image_kwargs["sprite_cache"] = cls.sprite_cache
 
             if module_drawer:
                 make_image_kwargs["module_drawer"] = cls._get_module_drawer(
@@ -289,23 +654,12 @@ class QRCodeGeneratorService:
                     make_image_kwargs["color_mask"] = color_mask_instance
 
             if embedded_image:
-                cls._ensure_temp_dir()
-                try:
-                    image_bytes = base64.b64decode(
-                        embedded_image.split(",")[1]
-                        if "," in embedded_image
-                        else embedded_image
-                    )
-                    image = Image.open(io.BytesIO(image_bytes))
-                except (binascii.Error, UnidentifiedImageError) as exc:
-                    raise ServiceError(
-                        code="invalid_embedded_image",
-                        message="Invalid embedded_image data",
-                        status_code=400,
-                    ) from exc
-                image_path = cls.TEMP_DIR / f"{uuid4()}.png"
-                image.save(image_path)
-                make_image_kwargs["embeded_image_path"] = str(image_path)
+                if settings.qr_logo_cache.enabled:
+                    make_image_kwargs["logo_cache"] = cls.logo_cache
+                make_image_kwargs["embedded_image_key"] = cls._digest(embedded_image)
+                make_image_kwargs["embedded_image"] = cls._load_embedded_image(
+                    embedded_image, make_image_kwargs["embedded_image_key"]
+                )
 
         else:
             if fill_color:
@@ -313,19 +667,175 @@ class QRCodeGeneratorService:
             if back_color:
                 make_image_kwargs["back_color"] = cls._hex_to_rgb(back_color)
 
+        return make_image_kwargs
+
+    @classmethod
+    def _load_embedded_image(cls, embedded_image: str, key: str) -> "Image.Image":
+        """Decode a base64 logo once, normalised to RGB or RGBA"""
+        from PIL import Image
+
+        cached = (
+            cls.logo_cache.get(("source", key))
+            if settings.qr_logo_cache.enabled
+            else None
+        )
+        if cached is not None:
+            return cached
+
+        try:
+            image_bytes = base64.b64decode(
+                embedded_image.split(",")[1]
+                if "," in embedded_image
+                else embedded_image
+            )
+            image = Image.open(io.BytesIO(image_bytes))
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        except (binascii.Error, OSError) as exc:
+            raise ServiceError(
+                code="invalid_embedded_image",
+                message="Invalid embedded_image data",
+                status_code=400,
+            ) from exc
+
+        if settings.qr_logo_cache.enabled:
+            cls.logo_cache.set(("source", key), image)
+        return image
+
+    @classmethod
+    def _get_matrix(
+        cls, data: str, version: int | None, error_correction: str
+    ) -> "QRMatrix":
+        """Encoded module matrix, shared by every style and output format"""
+        from .qr_matrix import QRMatrix
+
+        key = (data, version, error_correction)
+        if settings.qr_matrix_cache.enabled:
+            cached = cls.matrix_cache.get(key)
+            if cached is not None:
+                return cached
+
+        matrix = QRMatrix.encode(
+            data, version, cls.ERROR_CORRECTION_MAP[error_correction]
+        )
+        if settings.qr_matrix_cache.enabled:
+            cls.matrix_cache.set(key, matrix)
+        return matrix
+
+    @classmethod
+    def _render_data(
+        cls,
+        data: str,
+        version: int | None,
+        box_size: int,
+        border: int,
+        error_correction: str,
+        output_format: str,
+        final_size: int | None,
+        sizing: str,
+        make_image_kwargs: dict,
+    ) -> dict:
+        stages = metrics.stages()
+        matrix = cls._get_matrix(data, version, error_correction)
+        stages.lap("matrix")
+
+        if output_format == "ascii" or output_format.startswith("svg"):
+            from .qr_serializers import to_ascii, to_svg
+
+            started = time.perf_counter()
+            if output_format == "ascii":
+                text = to_ascii(matrix, border)
+            else:
+                text = to_svg(
+                    matrix,
+                    box_size=box_size,
+                    border=border,
+                    fragment=output_format == "svg-fragment",
+                )
+            stages.lap("serialize")
+            return {
+                "image": text,
+                "format": output_format,
+                "size": None,
+                "encoding": cls._encoding_info(None, len(text.encode()), started),
+                "stages": stages.durations,
+            }
+
+        fit_box_size = 0
+        if final_size and sizing == "pixel_perfect":
+            # Largest whole-pixel module that fits, so the image is drawn at
+            # its final scale instead of being resampled afterwards
+            fit_box_size = final_size // (matrix.size + 2 * border)
+            if fit_box_size:
+                box_size = fit_box_size
+
+        qr = matrix.to_qrcode(
+            error_correction=cls.ERROR_CORRECTION_MAP[error_correction],
+            box_size=box_size,
+            border=border,
+        )
+
+        if "color_mask" in make_image_kwargs:
+            # Color masks keep per-image state (e.g. the resized mask image),
+            # so every render gets its own shallow copy
+            make_image_kwargs = {
+                **make_image_kwargs,
+                "color_mask": copy.copy(make_image_kwargs["color_mask"]),
+            }
+
+        if "image_factory" in make_image_kwargs:
+            # StyledQRImage books its color mask and logo steps separately
+            make_image_kwargs = {**make_image_kwargs, "stages": stages}
+
         img = qr.make_image(**make_image_kwargs)
 
         if hasattr(img, "convert"):
             img = img.convert("RGB")  # type: ignore
+        stages.lap("draw")
+
+        if final_size and img.size != (final_size, final_size):  # type: ignore
+            from PIL import Image
+
+            if fit_box_size:
+                # Centre the sharp render on the background, leaving the
+                # remainder (less than one module per side) as extra quiet zone
+                canvas = Image.new(
+                    "RGB",
+                    (final_size, final_size),
+                    cls._background_color(make_image_kwargs),
+                )
+                offset = (final_size - img.size[0]) // 2  # type: ignore
+                canvas.paste(img, (offset, offset))  # type: ignore
+                img = canvas
+            else:
+                img = img.resize(  # type: ignore
+                    (final_size, final_size), resample=Image.Resampling.LANCZOS
+                )
+            stages.lap("resize")
 
-        if final_size and hasattr(img, "resize"):
-            img = img.resize(  # type: ignore
-                (final_size, final_size), resample=Image.Resampling.LANCZOS
-            )
+        started = time.perf_counter()
+        if output_format == "png" and settings.qr_encode.reduce_colors:
+            img = cls._reduce_colors(img)  # type: ignore
 
         buffer = io.BytesIO()
-        img.save(buffer, format="PNG")  # type: ignore
-        qr_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        if output_format == "webp":
+            # Lossless WebP does its own palette and bit depth reduction
+            img.save(  # type: ignore
+                buffer,
+                format="WEBP",
+                lossless=True,
+                method=settings.qr_encode.webp_method,
+            )
+        else:
+            img.save(  # type: ignore
+                buffer,
+                format="PNG",
+                compress_level=settings.qr_encode.png_compress_level,
+                optimize=settings.qr_encode.png_optimize,
+            )
+        # BytesIO hands over its internal bytes object here instead of copying
+        # it, as nothing else holds a view on the buffer
+        qr_data = buffer.getvalue()
+        stages.lap("encode")
 
         size_info = (
             {"width": img.size[0], "height": img.size[1]}  # type: ignore
@@ -333,7 +843,162 @@ class QRCodeGeneratorService:
             else None
         )
 
-        if image_path:
-            image_path.unlink()
+        return {
+            "image": qr_data,
+            "format": output_format,
+            "size": size_info,
+            "encoding": cls._encoding_info(img.mode, len(qr_data), started),  # type: ignore
+            "stages": stages.durations,
+        }
+
+    @staticmethod
+    def _reduce_colors(img: "Image.Image") -> "Image.Image":
+        """
+        Smallest lossless PNG mode for an RGB render
+
+        Plain black on white becomes 1-bit; other renders with few colors
+        (solid fills, antialiased module edges) become a palette image, which
+        Pillow writes at 1, 2, 4 or 8 bits per pixel depending on the palette
+        size. Gradients, logos and resampled images keep RGB: with hundreds
+        of colors, filtered RGB rows compress better than palette indices.
+        """
+        from PIL import Image
+
+        counts = img.getcolors(settings.qr_encode.png_palette_max_colors)
+        if counts is None:
+            return img
+        colors = [color for _, color in counts]
+
+        if all(color in ((0, 0, 0), (255, 255, 255)) for color in colors):
+            return img.convert("1", dither=Image.Dither.NONE)
+
+        # Blends between a fill and a background color differ in every
+        # channel that differs between the two, so one channel usually tells
+        # all colors apart and maps straight to palette indices. Pillow's own
+        # palette conversions approximate through a color cube instead, and
+        # median cut costs hundreds of milliseconds on large renders
+        for band in range(3):
+            values = [color[band] for color in colors]
+            if len(set(values)) == len(values):
+                lut = [0] * 256
+                for index, value in enumerate(values):
+                    lut[value] = index
+                indexed = img.getchannel(band).point(lut)
+                indexed.putpalette([value for color in colors for value in color])
+                return indexed
+
+        return img
+
+    @staticmethod
+    def _encoding_info(mode: str | None, size: int, started: float) -> dict:
+        return {
+            "mode": mode,
+            "bytes": size,
+            "encode_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    @staticmethod
+    def _background_color(make_image_kwargs: dict) -> tuple | str:
+        if "color_mask" in make_image_kwargs:
+            return make_image_kwargs["color_mask"].back_color[:3]
+        return make_image_kwargs.get("back_color", "white")
+
+    @classmethod
+    def _render_batch(cls, items: list[tuple[int, str]], options: dict) -> list[dict]:
+        """Render many payloads with one shared set of drawers and masks"""
+        make_image_kwargs = cls._build_image_kwargs(
+            output_format=options["output_format"],
+            fill_color=options["fill_color"],
+            back_color=options["back_color"],
+            use_styled_image=options["use_styled_image"],
+            module_drawer=options["module_drawer"],
+            eye_drawer=options["eye_drawer"],
+            color_mask=options["color_mask"],
+            embedded_image=options["embedded_image"],
+        )
+        results = []
+        for index, data in items:
+            try:
+                result = cls._render_data(
+                    data=data,
+                    version=options["version"],
+                    box_size=options["box_size"],
+                    border=options["border"],
+                    error_correction=options["error_correction"],
+                    output_format=options["output_format"],
+                    final_size=options["final_size"],
+                    sizing=options["sizing"],
+                    make_image_kwargs=make_image_kwargs,
+                )
+            except ServiceError as exc:
+                result = {"error": {"code": exc.code, "message": exc.message}}
+            except Exception as exc:
+                logger.warning("Batch item %s failed: %s", index, exc)
+                result = {
+                    "error": {
+                        "code": "render_failed",
+                        "message": str(exc) or type(exc).__name__,
+                    }
+                }
+            results.append({"index": index, "data": data, **result})
+
+        return results
+
+
+def _load_params(params: dict) -> dict:
+    """Rebuild styling configs from the primitives sent to a worker"""
+    return {
+        **params,
+        "module_drawer": (
+            ModuleDrawerConfig.model_validate(params["module_drawer"])
+            if params["module_drawer"]
+            else None
+        ),
+        "eye_drawer": (
+            EyeDrawerConfig.model_validate(params["eye_drawer"])
+            if params["eye_drawer"]
+            else None
+        ),
+        "color_mask": (
+            ColorMaskConfig.model_validate(params["color_mask"])
+            if params["color_mask"]
+            else None
+        ),
+    }
+
 
-        return {"image": qr_data, "format": "png", "size": size_info}
+def render_qr(params: dict) -> dict:
+    """Worker entry point: rebuild configs from primitives and render"""
+    return QRCodeGeneratorService._render(**_load_params(params))
+
+
+def render_qr_batch(items: list[tuple[int, str]], options: dict) -> list[dict]:
+    """Worker entry point for one chunk of a batch render"""
+    return QRCodeGeneratorService._render_batch(items, _load_params(options))
+
+
+def warm_up_worker() -> None:
+    """
+    Render pool initializer: render a styled sample PNG, so the first real
+    request doesn't pay for importing Pillow, qrcode and the drawers
+    """
+    QRCodeGeneratorService._render_data(
+        data="artifice",
+        version=None,
+        box_size=10,
+        border=4,
+        error_correction="M",
+        output_format="png",
+        final_size=None,
+        sizing="pixel_perfect",
+        make_image_kwargs=QRCodeGeneratorService._build_image_kwargs(
+            output_format="png",
+            fill_color=None,
+            back_color=None,
+            use_styled_image=True,
+            module_drawer=None,
+            eye_drawer=None,
+            color_mask=None,
+            embedded_image=None,
+        ),
+    )
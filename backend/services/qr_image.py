@@ -0,0 +1,308 @@
+import copy
+from types import SimpleNamespace
+
+from PIL import Image
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.moduledrawers.pil import (
+    CircleModuleDrawer,
+    GappedSquareModuleDrawer,
+    HorizontalBarsDrawer,
+    RoundedModuleDrawer,
+    SquareModuleDrawer,
+    VerticalBarsDrawer,
+)
+from qrcode.main import ActiveWithNeighbors
+
+from core import metrics
+
+from .cache import LRUCache
+
+# Drawers whose output for a module only depends on whether its N/E/S/W
+# neighbours are active, and never leaves the module's own box
+SPRITE_DRAWERS = (
+    CircleModuleDrawer,
+    GappedSquareModuleDrawer,
+    HorizontalBarsDrawer,
+    RoundedModuleDrawer,
+    SquareModuleDrawer,
+    VerticalBarsDrawer,
+)
+DRAWER_PARAMS = ("size_ratio", "radius_ratio", "horizontal_shrink", "vertical_shrink")
+
+# Module codes in the code map: 0 is inactive, 1 + neighbour bits for data
+# modules, and the same shifted by EYE_CODE for finder pattern modules
+NORTH, EAST, SOUTH, WEST = 1, 2, 4, 8
+EYE_CODE = 16
+
+# Sprites are drawn this many modules in from the canvas corner: fractional
+# drawer coordinates (e.g. a 0.9999999999999998 gap) round differently at 0
+# than at the positions real modules sit at
+SPRITE_OFFSET = 8
+
+# A masked paste costs about as much as pasting one sprite per this many
+# pixels of its bounding box; sparser codes are pasted module by module
+BULK_PASTE_PIXELS = 600
+
+
+class _SpriteCanvas:
+    """Just enough of a StyledPilImage for a drawer to paint one module"""
+
+    def __init__(self, mode: str, size: int, box_size: int, back_color, paint_color):
+        self.mode = mode
+        self.box_size = box_size
+        self.paint_color = paint_color
+        self.color_mask = SimpleNamespace(back_color=back_color)
+        self._img = Image.new(mode, (size, size), back_color)
+
+
+def _neighbours(state: int) -> ActiveWithNeighbors:
+    return ActiveWithNeighbors(
+        NW=False,
+        N=bool(state & NORTH),
+        NE=False,
+        W=bool(state & WEST),
+        me=True,
+        E=bool(state & EAST),
+        SW=False,
+        S=bool(state & SOUTH),
+        SE=False,
+    )
+
+
+def render_sprites(
+    drawer, mode: str, box_size: int, back_color, paint_color
+) -> dict[int, Image.Image | tuple]:
+    """
+    Rasterize every shape a drawer can produce for one module
+
+    Keys are neighbour bit masks (only 0 for drawers that ignore
+    neighbours). Single-colour sprites are stored as that colour, so they
+    can be filled through a mask without building a tiled image.
+    """
+    offset = SPRITE_OFFSET * box_size
+    canvas = _SpriteCanvas(mode, offset + box_size, box_size, back_color, paint_color)
+    drawer = copy.copy(drawer)
+    drawer.initialize(img=canvas)
+
+    area = (offset, offset, offset + box_size, offset + box_size)
+    box = ((offset, offset), (offset + box_size - 1, offset + box_size - 1))
+    states = range(16) if drawer.needs_neighbors else (0,)
+    sprites = {}
+    for state in states:
+        canvas._img.paste(back_color, area)
+        drawer.drawrect(box, _neighbours(state) if drawer.needs_neighbors else True)
+        sprite = canvas._img.crop(area)
+        colors = sprite.getcolors(1)
+        sprites[state] = colors[0][1] if colors else sprite
+    return sprites
+
+
+def sprites_size(sprites: dict) -> int:
+    return sum(
+        sprite.width * sprite.height * len(sprite.getbands())
+        for sprite in sprites.values()
+        if isinstance(sprite, Image.Image)
+    )
+
+
+def _tile(sprite: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Repeat a sprite over ``size``, doubling the filled area each step"""
+    tile = Image.new(sprite.mode, size)
+    tile.paste(sprite, (0, 0))
+    width, height = sprite.size
+    while width < size[0]:
+        tile.paste(tile.crop((0, 0, width, height)), (width, 0))
+        width *= 2
+    while height < size[1]:
+        tile.paste(tile.crop((0, 0, size[0], height)), (0, height))
+        height *= 2
+    return tile
+
+
+class StyledQRImage(StyledPilImage):
+    """
+    StyledPilImage with bulk module drawing and an in-memory logo cache
+
+    With the stock drawers, modules are not drawn one by one: each drawer's
+    possible module shapes are rasterized once (and kept in ``sprite_cache``),
+    and every shape is then pasted onto all modules that use it through a
+    single mask built from the module matrix. The output is identical to
+    per-module drawing. Other drawers fall back to the regular path.
+
+    The logo is passed as a decoded PIL image together with
+    ``embedded_image_key`` (its content digest). The resized, mode-converted
+    copy is kept in ``logo_cache`` per target width, so repeated renders of
+    the same logo at the same size skip the LANCZOS resize entirely.
+    """
+
+    def __init__(
+        self,
+        *args,
+        logo_cache: LRUCache | None = None,
+        sprite_cache: LRUCache | None = None,
+        embedded_image_key: str | None = None,
+        stages: metrics.Stages | None = None,
+        **kwargs,
+    ):
+        self.stages = stages or metrics.NO_STAGES
+        self.logo_cache = logo_cache
+        self.sprite_cache = sprite_cache
+        self.embedded_image_key = embedded_image_key
+        self.needs_drawrect = not all(
+            drawer is None or type(drawer) in SPRITE_DRAWERS
+            for drawer in (kwargs.get("module_drawer"), kwargs.get("eye_drawer"))
+        )
+        super().__init__(*args, **kwargs)
+
+    def init_new_image(self):
+        if self.needs_drawrect:
+            return super().init_new_image()
+        # Drawers only ever paint sprite canvases here
+        self.color_mask.initialize(self, self._img)
+
+    def process(self):
+        if not self.needs_drawrect:
+            self.draw_modules()
+        self.stages.lap("draw")
+
+        # StyledPilImage.process, with each step timed
+        self.color_mask.apply_mask(self._img)
+        self.stages.lap("color_mask")
+        if self.embedded_image:
+            self.draw_embedded_image()
+            self.stages.lap("logo")
+
+    def draw_modules(self):
+        count = self.width
+        box_size = self.box_size
+        origin = self.border * box_size
+        codes, cells = self._module_codes()
+        code_map = Image.frombytes("L", (count, count), bytes(codes))
+
+        module_sprites = self._get_sprites(self.module_drawer)
+        eye_sprites = self._get_sprites(self.eye_drawer)
+
+        for code, positions in cells.items():
+            if code > EYE_CODE:
+                sprite = eye_sprites[code - EYE_CODE - 1]
+            else:
+                sprite = module_sprites[code - 1]
+
+            rows = [row for row, _ in positions]
+            cols = [col for _, col in positions]
+            left, top = min(cols), min(rows)
+            right, bottom = max(cols) + 1, max(rows) + 1
+            area = (right - left) * (bottom - top) * box_size * box_size
+
+            if len(positions) * BULK_PASTE_PIXELS < area:
+                # Few modules spread over a large area: paste them one by one
+                for row, col in positions:
+                    x = origin + col * box_size
+                    y = origin + row * box_size
+                    self._img.paste(sprite, (x, y, x + box_size, y + box_size))
+                continue
+
+            mask = code_map.crop((left, top, right, bottom))
+            mask = mask.point(lambda value, code=code: 255 if value == code else 0, "1")
+            mask = mask.resize(
+                ((right - left) * box_size, (bottom - top) * box_size),
+                Image.Resampling.NEAREST,
+            )
+            if isinstance(sprite, Image.Image):
+                sprite = _tile(sprite, mask.size)
+
+            x = origin + left * box_size
+            y = origin + top * box_size
+            self._img.paste(sprite, (x, y, x + mask.width, y + mask.height), mask)
+
+    def _module_codes(self) -> tuple[bytearray, dict[int, list[tuple[int, int]]]]:
+        """Code map of the module matrix plus the positions using each code"""
+        count = self.width
+        modules = [[bool(active) for active in row] for row in self.modules]
+        empty = [False] * count
+        module_neighbours = self.module_drawer.needs_neighbors
+        eye_neighbours = self.eye_drawer.needs_neighbors
+
+        codes = bytearray(count * count)
+        cells: dict[int, list[tuple[int, int]]] = {}
+        for row in range(count):
+            above = modules[row - 1] if row else empty
+            current = modules[row]
+            below = modules[row + 1] if row + 1 < count else empty
+            for col in range(count):
+                if not current[col]:
+                    continue
+                is_eye = self.is_eye(row, col)
+                code = 1 + EYE_CODE if is_eye else 1
+                if eye_neighbours if is_eye else module_neighbours:
+                    code += (
+                        above[col] * NORTH
+                        + (col + 1 < count and current[col + 1]) * EAST
+                        + below[col] * SOUTH
+                        + (col > 0 and current[col - 1]) * WEST
+                    )
+                codes[row * count + col] = code
+                cells.setdefault(code, []).append((row, col))
+        return codes, cells
+
+    def _get_sprites(self, drawer) -> dict:
+        key = (
+            "sprites",
+            type(drawer).__name__,
+            tuple(getattr(drawer, name, None) for name in DRAWER_PARAMS),
+            self.box_size,
+            self._img.mode,
+            self.color_mask.back_color,
+            self.paint_color,
+        )
+        if self.sprite_cache is not None:
+            cached = self.sprite_cache.get(key)
+            if cached is not None:
+                return cached
+
+        sprites = render_sprites(
+            drawer,
+            self._img.mode,
+            self.box_size,
+            self.color_mask.back_color,
+            self.paint_color,
+        )
+        if self.sprite_cache is not None:
+            self.sprite_cache.set(key, sprites)
+        return sprites
+
+    def draw_embedded_image(self):
+        if not self.embedded_image:
+            return
+
+        # Same placement as StyledPilImage: the offset snaps to whole modules
+        total_width = int(self._img.size[0])
+        logo_width_ish = int(total_width * self.embedded_image_ratio)
+        logo_offset = (
+            int((int(total_width / 2) - int(logo_width_ish / 2)) / self.box_size)
+            * self.box_size
+        )
+        logo_width = total_width - logo_offset * 2
+
+        region = self._get_logo(logo_width)
+        if region.mode == "RGBA":
+            self._img.alpha_composite(region, (logo_offset, logo_offset))
+        else:
+            self._img.paste(region, (logo_offset, logo_offset))
+
+    def _get_logo(self, width: int) -> Image.Image:
+        key = ("logo", self.embedded_image_key, width, self._img.mode)
+        if self.logo_cache is not None and self.embedded_image_key:
+            cached = self.logo_cache.get(key)
+            if cached is not None:
+                return cached
+
+        region = self.embedded_image.resize(
+            (width, width), self.embedded_image_resample
+        )
+        if region.mode != self._img.mode:
+            region = region.convert(self._img.mode)
+
+        if self.logo_cache is not None and self.embedded_image_key:
+            self.logo_cache.set(key, region)
+        return region
@@ -0,0 +1,68 @@
+from PIL import Image
+from qrcode import QRCode
+
+DARK_TO_ONE = bytes.maketrans(b"\xff", b"\x01")
+
+
+class QRMatrix:
+    """
+    Encoded QR module matrix, bit-packed
+
+    Holds the outcome of the version search, Reed-Solomon encoding and mask
+    selection for one payload, independent of how it is later drawn. Modules
+    are stored one bit each (rows padded to whole bytes), about 4 KB for a
+    version 40 code instead of the library's list of lists of bools.
+    """
+
+    __slots__ = ("version", "size", "bits")
+
+    def __init__(self, version: int, size: int, bits: bytes):
+        self.version = version
+        self.size = size
+        self.bits = bits
+
+    @classmethod
+    def encode(
+        cls, data: str, version: int | None, error_correction: int
+    ) -> "QRMatrix":
+        """Encode ``data``, treating ``version`` as the smallest version to try"""
+        qr = QRCode(version=version, error_correction=error_correction)
+        qr.add_data(data)
+        qr.make(fit=True)
+
+        size = qr.modules_count
+        flat = bytes(bool(module) for row in qr.modules for module in row)
+        packed = Image.frombytes("L", (size, size), flat).point(
+            lambda value: 255 if value else 0, "1"
+        )
+        return cls(qr.version, size, packed.tobytes())
+
+    def unpack(self) -> bytes:
+        """One byte per module (0 or 1), row by row"""
+        size = self.size
+        image = Image.frombytes("1", (size, size), self.bits).convert("L")
+        return image.tobytes().translate(DARK_TO_ONE)
+
+    def rows(self) -> list[list[bool]]:
+        """Unpack into the list of lists of bools the image factories expect"""
+        size = self.size
+        flat = self.unpack()
+        return [
+            list(map(bool, flat[start : start + size]))
+            for start in range(0, size * size, size)
+        ]
+
+    def to_qrcode(self, error_correction: int, box_size: int, border: int) -> QRCode:
+        """A ready-made QRCode for this matrix, drawable by any factory"""
+        qr = QRCode(
+            version=self.version,
+            error_correction=error_correction,
+            box_size=box_size,
+            border=border,
+        )
+        qr.modules = self.rows()
+        qr.modules_count = self.size
+        # make_image() and print_ascii() only re-encode while data_cache is
+        # None; the matrix is already final, so mark it as compiled
+        qr.data_cache = self.bits
+        return qr
@@ -1,32 +1,96 @@
-import base64
+import binascii
+import hashlib
 import io
+import math
+from collections.abc import Awaitable, Callable
 from logging import getLogger
-from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
-import qrlyzer
-from PIL import Image, UnidentifiedImageError
+from core import metrics
+from core.config import settings
 
 from .exceptions import ServiceError
+from .singleflight import SingleFlight
+from .workers import WorkerPool
+
+# Pillow and qrlyzer are imported on first scan (or in the warm-up), not
+# with the API
+if TYPE_CHECKING:
+    from PIL import Image
 
 logger = getLogger(__name__)
 
+# Modes Image.reduce() handles; anything else is converted to L first
+REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK", "I", "F")
+
 
 class QRCodeScannerService:
 
-    TEMP_DIR = Path(__file__).parent.parent / "temp" / "qr" / "scan"
+    scan_pool = WorkerPool("qr_scan", settings.qr_scan)
+    scan_flight = SingleFlight("qr_scan", settings.single_flight.enabled)
 
     @classmethod
-    def _ensure_temp_dir(cls):
-        cls.TEMP_DIR.mkdir(exist_ok=True)
+    async def warm_up(cls) -> None:
+        """Start the scan workers with Pillow's common decoders loaded"""
+        await cls.scan_pool.start(warm_up_worker)
 
     @classmethod
-    async def scan_qr(cls, image_base64: str, auto_resize: bool = True) -> dict:
+    async def scan_qr(
+        cls,
+        image_base64: str,
+        auto_resize: bool = True,
+        is_cancelled: Callable[[], Awaitable[bool]] | None = None,
+    ) -> dict:
         """
         Scan QR code(s) from base64 encoded image using qrlyzer
 
+        Decoding and detection run in the scan worker pool so large photos
+        don't block the event loop. Concurrent scans of the same image share
+        one decode.
+
         Args:
             image_base64: Base64 encoded image data
             auto_resize: Enable auto-resizing for better detection (100px-1280px)
+            is_cancelled: Optional callback that drops the queued scan once it
+                returns True (e.g. on client disconnect)
+
+        Returns:
+            dict with decoded QR codes and metadata
+
+        Raises:
+            ServiceError: If image is invalid or no QR codes found
+        """
+        key = (hashlib.sha256(image_base64.encode()).digest(), auto_resize)
+        return await cls.scan_flight.run(
+            key,
+            cls._run,
+            scan_image,
+            image_base64,
+            auto_resize,
+            is_cancelled=is_cancelled,
+        )
+
+    @classmethod
+    async def scan_qr_file(
+        cls,
+        image_file: BinaryIO,
+        auto_resize: bool = True,
+        is_cancelled: Callable[[], Awaitable[bool]] | None = None,
+    ) -> dict:
+        """
+        Scan QR code(s) from an uploaded image file using qrlyzer
+
+        The file is decoded by PIL in place, without an intermediate copy,
+        unless the scan pool runs in separate processes and the bytes have
+        to be shipped over. The scan takes ownership of the file and closes
+        it once the work ends, which after a timeout or disconnect is later
+        than this returns.
+
+        Args:
+            image_file: Readable binary file positioned at the image start
+            auto_resize: Enable auto-resizing for better detection (100px-1280px)
+            is_cancelled: Optional callback that drops the queued scan once it
+                returns True (e.g. on client disconnect)
 
         Returns:
             dict with decoded QR codes and metadata
@@ -34,11 +98,102 @@ class QRCodeScannerService:
         Raises:
             ServiceError: If image is invalid or no QR codes found
         """
+        if cls.scan_pool.config.backend == "process":
+            with image_file:
+                image_bytes = image_file.read()
+            return await cls._run(
+                scan_image_bytes, image_bytes, auto_resize, is_cancelled=is_cancelled
+            )
+
+        return await cls._run(
+            cls._scan_file,
+            image_file,
+            auto_resize,
+            is_cancelled=is_cancelled,
+            on_done=image_file.close,
+        )
+
+    @classmethod
+    async def _run(cls, fn: Callable[..., dict], *args, **kwargs) -> dict:
+        """Scan in the pool, then record the scan's stage timings and sizes"""
+        result = await cls.scan_pool.run(fn, *args, **kwargs)
+        metrics.observe_stages("qr_scan", result.pop("stages"))
+        metrics.observe_image("qr_scan", result.pop("pixels"), result.pop("bytes"))
+        return result
+
+    @classmethod
+    def _scan(cls, image_base64: str, auto_resize: bool) -> dict:
+        stages = metrics.stages()
+        # a2b_base64 takes the ASCII str as is, skipping the encode copy that
+        # b64decode makes; find() + 1 is 0 without a data URL prefix, and a
+        # [0:] slice returns the same string object
         try:
-            image_bytes = base64.b64decode(
-                image_base64.split(",")[1] if "," in image_base64 else image_base64
+            image_bytes = binascii.a2b_base64(
+                image_base64[image_base64.find(",") + 1 :]
             )
-            image = Image.open(io.BytesIO(image_bytes))
+        except (binascii.Error, ValueError) as exc:
+            raise ServiceError(
+                code="invalid_image",
+                message="Invalid image data provided",
+                status_code=400,
+            ) from exc
+
+        stages.lap("base64")
+
+        return cls._scan_file(io.BytesIO(image_bytes), auto_resize, stages)
+
+    @staticmethod
+    def _decode_gray(
+        image: "Image.Image",
+        max_pixels: int,
+        stages: metrics.Stages | None = None,
+    ) -> "Image.Image":
+        """
+        Decode an opened image to grayscale of at most ``max_pixels`` pixels
+
+        JPEGs are decoded straight to luma at a reduced DCT scale via draft
+        mode, so a large photo never exists at full size in RGB. Other
+        formats are box-reduced before the grayscale conversion.
+        """
+        stages = stages or metrics.NO_STAGES
+        width, height = image.size
+        scale = min(1.0, math.sqrt(max_pixels / (width * height)))
+
+        if image.format == "JPEG":
+            image.draft("L", (math.ceil(width * scale), math.ceil(height * scale)))
+
+        image.load()
+        stages.lap("decode")
+
+        if image.width * image.height > max_pixels:
+            if image.mode not in REDUCIBLE_MODES:
+                image = image.convert("L")
+            factor = math.ceil(math.sqrt(image.width * image.height / max_pixels))
+            image = image.reduce(factor)
+
+        image = image if image.mode == "L" else image.convert("L")
+        stages.lap("grayscale")
+        return image
+
+    @classmethod
+    def _scan_file(
+        cls,
+        image_file: BinaryIO,
+        auto_resize: bool,
+        stages: metrics.Stages | None = None,
+    ) -> dict:
+        import qrlyzer
+        from PIL import Image, UnidentifiedImageError
+
+        stages = stages or metrics.stages()
+        start = image_file.tell()
+        size = image_file.seek(0, io.SEEK_END) - start
+        image_file.seek(start)
+
+        try:
+            image = Image.open(image_file)
+            stages.lap("open")
+            pixels = image.width * image.height
         except UnidentifiedImageError as exc:
             raise ServiceError(
                 code="invalid_image",
@@ -47,7 +202,9 @@ class QRCodeScannerService:
             ) from exc
 
         try:
-            image_gray = image.convert("L")
+            image_gray = cls._decode_gray(
+                image, settings.qr_scan_input.max_pixels, stages
+            )
         except Exception as exc:
             raise ServiceError(
                 code="image_processing_failed",
@@ -62,6 +219,7 @@ class QRCodeScannerService:
                 height=image_gray.height,
                 auto_resize=auto_resize,
             )
+            stages.lap("detect")
 
             if not codes or len(codes) == 0:
                 raise ServiceError(
@@ -76,6 +234,9 @@ class QRCodeScannerService:
                 "codes": codes,
                 "count": len(codes),
                 "success": True,
+                "stages": stages.durations,
+                "pixels": pixels,
+                "bytes": size,
             }
 
         except ServiceError:
@@ -88,3 +249,21 @@ class QRCodeScannerService:
                 status_code=500,
                 context={"error": str(exc)},
             ) from exc
+
+
+def scan_image(image_base64: str, auto_resize: bool) -> dict:
+    """Worker entry point for the scan pool"""
+    return QRCodeScannerService._scan(image_base64, auto_resize)
+
+
+def scan_image_bytes(image_bytes: bytes, auto_resize: bool) -> dict:
+    """Worker entry point for uploads scanned in a process pool"""
+    return QRCodeScannerService._scan_file(io.BytesIO(image_bytes), auto_resize)
+
+
+def warm_up_worker() -> None:
+    """Scan pool initializer: load qrlyzer, Pillow and its common format plugins"""
+    import qrlyzer
+    from PIL import Image
+
+    Image.preinit()
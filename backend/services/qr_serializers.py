@@ -0,0 +1,90 @@
+import re
+
+from .qr_matrix import QRMatrix
+
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+# Same presentation attributes as qrcode's SvgPathImage, so clients styling
+# "#qr-path" keep working; crispEdges avoids hairline seams between runs
+SVG_PATH_ATTRS = (
+    'id="qr-path" fill="#000000" fill-opacity="1" fill-rule="nonzero" '
+    'stroke="none" shape-rendering="crispEdges"'
+)
+
+DARK_RUN = re.compile(rb"\x01+")
+
+# Upper/lower half-block codes (top module + 2 * bottom module) mapped to the
+# cp437 characters print_ascii uses: space, upper half, lower half, full block
+HALF_BLOCKS = bytes.maketrans(b"\x00\x01\x02\x03", bytes((255, 223, 220, 219)))
+
+
+def _mm(pixels: int) -> str:
+    """Pixel length in the library's units, where 10 pixels are 1mm"""
+    whole, tenths = divmod(pixels, 10)
+    return f"{whole}mm" if not tenths else f"{whole}.{tenths}mm"
+
+
+def svg_path_data(matrix: QRMatrix, border: int) -> str:
+    """
+    Path data covering every dark module, in module units
+
+    Horizontal runs of dark modules are merged into one rectangle each,
+    which typically shrinks the path several times compared to one
+    square per module.
+    """
+    size = matrix.size
+    flat = matrix.unpack()
+    parts = []
+    for row in range(size):
+        y = row + border
+        for run in DARK_RUN.finditer(flat, row * size, (row + 1) * size):
+            x = run.start() - row * size + border
+            width = run.end() - run.start()
+            parts.append(f"M{x},{y}h{width}v1h-{width}z")
+    return "".join(parts)
+
+
+def to_svg(matrix: QRMatrix, box_size: int, border: int, fragment: bool) -> str:
+    """
+    SVG document (or ``svg:``-prefixed fragment) with a single path
+
+    The outer size is the same as qrcode's SVG factories produce; the
+    viewBox is in modules, so the path does not depend on ``box_size``.
+    """
+    count = matrix.size + 2 * border
+    dimension = _mm(count * box_size)
+    attrs = (
+        f'width="{dimension}" height="{dimension}" version="1.1" '
+        f'viewBox="0 0 {count} {count}"'
+    )
+    path = f'd="{svg_path_data(matrix, border)}" {SVG_PATH_ATTRS}'
+
+    if fragment:
+        return (
+            f'<svg:svg xmlns:svg="{SVG_NAMESPACE}" {attrs}>'
+            f"<svg:path {path} /></svg:svg>"
+        )
+    return f'<svg {attrs} xmlns="{SVG_NAMESPACE}"><path {path} /></svg>'
+
+
+def to_ascii(matrix: QRMatrix, border: int) -> str:
+    """Half-block text rendering, identical to ``QRCode.print_ascii``"""
+    size = matrix.size
+    width = size + 2 * border
+    flat = matrix.unpack()
+    margin = b"\x00" * border
+    blank = bytes(width)
+    rows = [blank] * border
+    rows.extend(
+        margin + flat[start : start + size] + margin
+        for start in range(0, size * size, size)
+    )
+    rows.extend([blank] * (border + 1))
+
+    # Each text line covers two module rows; with at most 1 per byte in
+    # both rows, top + 2 * bottom never carries into the next byte
+    lines = [
+        (int.from_bytes(rows[row]) + 2 * int.from_bytes(rows[row + 1])).to_bytes(width)
+        for row in range(0, len(rows) - 1, 2)
+    ]
+    lines.append(b"")
+    return b"\n".join(lines).translate(HALF_BLOCKS).decode("cp437")
@@ -0,0 +1,92 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.task: asyncio.Task | None = None
+        self.cancel_checks: list[Callable[[], Awaitable[bool]] | None] = []
+
+    async def all_cancelled(self) -> bool:
+        """True once every caller sharing this flight has gone away"""
+        checks = list(self.cancel_checks)
+        if any(check is None for check in checks):
+            return False
+        for check in checks:
+            if not await check():
+                return False
+        return True
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task and receive the same result
+    (or exception) instead of starting their own. Nothing is kept once the
+    task finishes, so this only merges calls that overlap in time; caching
+    finished results is left to the caller.
+
+    The work runs detached from any one caller, so a caller being cancelled
+    never fails the others. ``is_cancelled`` callbacks are combined: the
+    callable receives one that reports True only when all callers sharing
+    the flight report True.
+    """
+
+    def __init__(self, name: str, enabled: bool = True) -> None:
+        self.name = name
+        self.enabled = enabled
+        self._flights: dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        is_cancelled: Callable[[], Awaitable[bool]] | None = None,
+    ) -> Any:
+        if not self.enabled:
+            return await fn(*args, is_cancelled=is_cancelled)
+
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.cancel_checks.append(is_cancelled)
+            flight.task = asyncio.create_task(
+                fn(
+                    *args,
+                    is_cancelled=(
+                        flight.all_cancelled if is_cancelled is not None else None
+                    ),
+                )
+            )
+            flight.task.add_done_callback(lambda task: self._finish(key, task))
+            self._flights[key] = flight
+            self.executions += 1
+        else:
+            flight.cancel_checks.append(is_cancelled)
+            self.coalesced += 1
+
+        return await asyncio.shield(flight.task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._flights.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0,
+        }
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import BrokenExecutor, Executor, Future, ThreadPoolExecutor
+from functools import partial
+from logging import getLogger
+from typing import Any
+
+from core.config import WorkerPoolConfig
+
+from .exceptions import ServiceError
+
+logger = getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    Bounded executor for CPU-bound service work with admission control
+
+    At most ``workers + max_queue`` tasks are admitted at once; anything beyond
+    that is rejected with a 503 and a ``Retry-After`` hint instead of piling
+    up behind the event loop. Functions and arguments must be picklable when
+    the ``process`` backend is used.
+
+    When ``is_cancelled`` is given (e.g. ``Request.is_disconnected``) it is
+    polled while the task waits; a queued task is dropped as soon as it
+    reports True. Work that has already started runs to completion in the
+    background, since executors cannot interrupt it, and keeps its slot
+    until it does: timed-out or abandoned work still counts against
+    admission. ``on_done`` is called once the work has ended or was never
+    run, which can be after ``run()`` returned; use it to release anything
+    the work still reads, such as an uploaded file.
+
+    Workers start on demand unless ``start()`` is awaited, which starts all
+    of them up front and runs an initializer (typically a warm-up) in each.
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, name: str, config: WorkerPoolConfig) -> None:
+        self.name = name
+        self.config = config
+        self.workers = config.workers or os.cpu_count() or 1
+        self.initializer: Callable[[], Any] | None = None
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.config.max_queue
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.config.backend == "process":
+                # Imported here: multiprocessing is only needed once a
+                # process pool actually starts
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=self.name,
+                    initializer=self.initializer,
+                )
+        return self._executor
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        is_cancelled: Callable[[], Awaitable[bool]] | None = None,
+        on_done: Callable[[], Any] | None = None,
+    ) -> Any:
+        if self.config.backend == "inline":
+            try:
+                return fn(*args)
+            finally:
+                if on_done is not None:
+                    on_done()
+
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            if on_done is not None:
+                on_done()
+            raise ServiceError(
+                code=f"{self.name}_queue_full",
+                message="Server is busy, please retry later",
+                status_code=503,
+                context={"retry_after": self.config.retry_after},
+                headers={"Retry-After": str(self.config.retry_after)},
+            )
+
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            try:
+                future = self.executor.submit(fn, *args)
+            except BaseException:
+                self._release(on_done)
+                raise
+            # Released when the work itself ends (or is dropped from the
+            # queue), not when this waiter gives up on it
+            future.add_done_callback(partial(self._release, on_done))
+
+            try:
+                return await asyncio.wait_for(
+                    self._wait(future, is_cancelled), timeout=self.config.timeout
+                )
+            except TimeoutError as exc:
+                future.cancel()
+                self.timeouts += 1
+                raise ServiceError(
+                    code=f"{self.name}_timeout",
+                    message="Processing took too long",
+                    status_code=504,
+                    context={"timeout": self.config.timeout},
+                ) from exc
+        except BrokenExecutor as exc:
+            logger.exception("Worker pool %s is broken, restarting", self.name)
+            self.shutdown()
+            raise ServiceError(
+                code=f"{self.name}_unavailable",
+                message="Worker pool is restarting, please retry later",
+                status_code=503,
+                context={"retry_after": self.config.retry_after},
+                headers={"Retry-After": str(self.config.retry_after)},
+            ) from exc
+
+    def _release(
+        self, on_done: Callable[[], Any] | None = None, future: Future | None = None
+    ) -> None:
+        # Done callbacks run in executor threads
+        with self._pending_lock:
+            self._pending -= 1
+        if on_done is not None:
+            on_done()
+
+    async def start(self, initializer: Callable[[], Any] | None = None) -> None:
+        """
+        Start every worker now, running ``initializer`` in each
+
+        The initializer must be picklable for the process backend. It is
+        kept for workers started later, e.g. after a broken pool was
+        rebuilt, unless it fails, in which case the pool falls back to
+        plain on-demand workers. The inline backend runs it once in-process.
+        """
+        self.initializer = initializer
+        if self.config.backend == "inline":
+            if initializer is not None:
+                initializer()
+            return
+
+        self.shutdown()
+        executor = self.executor
+        try:
+            # Executors add a worker per submission while none is idle, so
+            # one task per worker submitted at once starts all of them
+            await asyncio.gather(
+                *(
+                    asyncio.wrap_future(executor.submit(os.getpid))
+                    for _ in range(self.workers)
+                )
+            )
+        except BrokenExecutor:
+            logger.exception("Worker pool %s failed to start", self.name)
+            self.initializer = None
+            self.shutdown()
+            return
+        logger.info("Worker pool %s started (%d workers)", self.name, self.workers)
+
+    async def _wait(
+        self,
+        future: Future,
+        is_cancelled: Callable[[], Awaitable[bool]] | None,
+    ) -> Any:
+        waiter = asyncio.wrap_future(future)
+        if is_cancelled is None or not self.config.cancel_on_disconnect:
+            return await waiter
+
+        while True:
+            done, _ = await asyncio.wait({waiter}, timeout=self.POLL_INTERVAL)
+            if done:
+                return waiter.result()
+            if await is_cancelled():
+                # Cancel the executor future itself: the wrapper would only
+                # pass the cancellation on in a later loop iteration, by which
+                # time a freed worker may have picked the task up
+                future.cancel()
+                waiter.cancel()
+                self.cancelled += 1
+                raise ServiceError(
+                    code="client_disconnected",
+                    message="Client closed the connection",
+                    status_code=499,
+                )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.config.backend,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+        }
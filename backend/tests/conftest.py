@@ -0,0 +1,49 @@
+import base64
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from qrcode import QRCode
+
+from core.config import settings
+
+# Render and analyse in-process: spawned workers would re-import the test
+# modules, and worker IPC is not what these tests cover. Scans keep their
+# default thread pool.
+settings.warm_up = False
+settings.qr_render.backend = "inline"
+settings.password_pool.backend = "inline"
+
+
+def qr_png(data: str, box_size: int = 8) -> bytes:
+    qr = QRCode(box_size=box_size)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image().get_image().convert("L").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def png_base64(image: Image.Image) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    from main import app
+
+    # Not used as a context manager: the lifespan would start worker pools
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from services.password import PasswordGeneratorService
+    from services.qr_generator_service import QRCodeGeneratorService
+
+    QRCodeGeneratorService.render_cache.clear()
+    PasswordGeneratorService.strength_cache.clear()
+    yield
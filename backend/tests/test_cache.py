@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from services.cache import LRUCache
+from services.singleflight import SingleFlight
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_byte_limits():
+    cache = LRUCache(max_entries=10, max_bytes=10, max_entry_bytes=6, sizeof=len)
+    cache.set("big", "x" * 7)
+    cache.set("a", "x" * 6)
+    cache.set("b", "x" * 6)
+
+    assert cache.get("big") is None
+    assert cache.get("a") is None
+    assert cache.get("b") == "x" * 6
+    assert cache.stats()["bytes"] == 6
+
+
+def test_lru_ttl_expires_entries(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr("services.cache.time.monotonic", lambda: now)
+    cache = LRUCache(max_entries=10, ttl=60)
+    cache.set("a", 1)
+
+    now += 61
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_single_flight_coalesces_overlapping_calls():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work(value, is_cancelled=None):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.run("key", work, 21) for _ in range(5)))
+        later = await flight.run("key", work, 1)
+        return results, later
+
+    results, later = asyncio.run(scenario())
+
+    assert results == [42] * 5
+    # Nothing is kept once the flight lands
+    assert later == 2
+    assert calls == [21, 1]
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_single_flight_shares_errors_and_survives_a_cancelled_caller():
+    flight = SingleFlight("test")
+
+    async def work(is_cancelled=None):
+        await asyncio.sleep(0.02)
+        raise ValueError("boom")
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("key", work))
+        second = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(ValueError):
+            await second
+
+    asyncio.run(scenario())
+
+
+def test_single_flight_cancels_only_when_every_caller_has():
+    flight = SingleFlight("test")
+    seen = []
+    gone = {"a": True, "b": False}
+
+    async def work(is_cancelled=None):
+        await asyncio.sleep(0)
+        seen.append(await is_cancelled())
+        gone["b"] = True
+        seen.append(await is_cancelled())
+
+    async def check(name):
+        return gone[name]
+
+    async def scenario():
+        await asyncio.gather(
+            flight.run("key", work, is_cancelled=lambda: check("a")),
+            flight.run("key", work, is_cancelled=lambda: check("b")),
+        )
+
+    asyncio.run(scenario())
+
+    assert seen == [False, True]
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+
+from core.config import settings
+from services import password
+from services.password import PasswordGeneratorService
+from services.password_dictionaries import load_index
+
+
+def test_random_passwords_use_only_the_charset():
+    passwords = PasswordGeneratorService.random_passwords("abc", 12, 50)
+
+    assert len(passwords) == 50
+    assert all(len(value) == 12 and set(value) <= set("abc") for value in passwords)
+
+
+def test_random_passwords_are_unbiased():
+    # Plain byte % 90 would draw the first 76 characters 1.5 times as often
+    # as the rest; rejection sampling keeps every count near 1000
+    charset = "".join(chr(code) for code in range(33, 123))
+    counts = Counter(
+        "".join(PasswordGeneratorService.random_passwords(charset, 1000, 90))
+    )
+
+    assert set(counts) == set(charset)
+    assert all(800 < count < 1200 for count in counts.values())
+
+
+def test_entropy_weights_repeated_characters():
+    assert PasswordGeneratorService.entropy_bits("ab", 10) == 10
+    assert PasswordGeneratorService.entropy_bits("aab", 1) == 0.92
+
+
+def test_approximate_strength_matches_zxcvbn_tables():
+    from zxcvbn import feedback, time_estimates
+
+    info = PasswordGeneratorService.approximate_strength("abcdefg")
+    attack_times = time_estimates.estimate_attack_times(10**7)
+
+    assert info.approximate
+    assert info.score == attack_times["score"]
+    assert info.crack_times.online_throttling == (
+        attack_times["crack_times_display"]["online_throttling_100_per_hour"]
+    )
+    assert (
+        info.feedback.suggestions
+        == feedback.get_feedback(info.score, [])["suggestions"]
+    )
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    monkeypatch.setattr(PasswordGeneratorService.pool.config, "backend", "thread")
+    yield PasswordGeneratorService.pool
+    PasswordGeneratorService.pool.shutdown()
+
+
+def test_slow_analysis_falls_back_and_is_cached_later(monkeypatch, thread_pool):
+    monkeypatch.setattr(settings.password_analysis, "time_budget", 0.05)
+    release = threading.Event()
+    analyze_password = password.analyze_password
+
+    def slow_analysis(*args):
+        release.wait(5)
+        return analyze_password(*args)
+
+    monkeypatch.setattr(password, "analyze_password", slow_analysis)
+
+    async def scenario():
+        first = await PasswordGeneratorService.estimate_strength("correct horse")
+        release.set()
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            if len(PasswordGeneratorService.strength_cache):
+                break
+        return first, await PasswordGeneratorService.estimate_strength("correct horse")
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        release.set()
+
+    assert first.approximate
+    assert not second.approximate
+
+
+def test_user_inputs_are_matched_and_keyed_separately():
+    async def scenario():
+        plain = await PasswordGeneratorService.estimate_strength("qzvxartifice")
+        personal = await PasswordGeneratorService.estimate_strength(
+            "qzvxartifice", user_inputs=["qzvxartifice"]
+        )
+        return plain, personal
+
+    plain, personal = asyncio.run(scenario())
+
+    assert personal.guesses < plain.guesses
+
+
+def test_ranked_index_round_trip(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("Dragon\nmonkey\n\ndragon\nsupercalifragilistic\n")
+
+    index = load_index(words, tmp_path / "indexes", max_length=10)
+
+    assert index.entries == 2
+    assert (index["dragon"], index["monkey"]) == (1, 2)
+    assert "supercalifragilistic" not in index
+    assert "unlisted" not in index and 42 not in index
+
+
+def test_ranked_index_is_rebuilt_for_a_new_limit(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("short\nmuchlongerword\n")
+
+    short = load_index(words, tmp_path, max_length=5)
+    full = load_index(words, tmp_path, max_length=20)
+
+    assert short.path == full.path
+    assert "muchlongerword" not in short
+    assert full.rank("muchlongerword") == 2
+
+
+def test_ranked_indexes_of_same_named_lists_do_not_collide(tmp_path):
+    first, second = tmp_path / "a" / "words.txt", tmp_path / "b" / "words.txt"
+    for path, word in ((first, "alpha"), (second, "beta")):
+        path.parent.mkdir()
+        path.write_text(word + "\n")
+
+    indexes = [load_index(path, tmp_path / "indexes", 10) for path in (first, second)]
+
+    assert indexes[0].path != indexes[1].path
+    assert "alpha" in indexes[0] and "alpha" not in indexes[1]
@@ -0,0 +1,199 @@
+import base64
+import io
+import json
+import zipfile
+
+import pytest
+from PIL import Image
+
+from services.qr_generator_service import QRCodeGeneratorService
+
+GENERATE = "/api/v1/qr/generate"
+
+
+@pytest.fixture
+def render_count(monkeypatch) -> list:
+    """Renders that actually reached the service, as opposed to 304s"""
+    calls = []
+    generate_qr = QRCodeGeneratorService.generate_qr
+
+    async def counting(**options):
+        calls.append(options)
+        return await generate_qr(**options)
+
+    monkeypatch.setattr(QRCodeGeneratorService, "generate_qr", counting)
+    return calls
+
+
+def test_json_response_has_weak_etag_and_revalidates(client, render_count):
+    response = client.post(GENERATE, json={"data": "etag"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "immutable" in response.headers["cache-control"]
+    assert "Accept" in response.headers["vary"]
+
+    revalidated = client.post(
+        GENERATE, json={"data": "etag"}, headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert len(render_count) == 1
+
+
+def test_etag_depends_on_request_and_representation(client):
+    json_etag = client.post(GENERATE, json={"data": "one"}).headers["etag"]
+    other_etag = client.post(GENERATE, json={"data": "two"}).headers["etag"]
+    raw = client.post(GENERATE, json={"data": "one"}, headers={"Accept": "image/png"})
+
+    assert raw.headers["content-type"] == "image/png"
+    assert not raw.headers["etag"].startswith("W/")
+    assert len({json_etag, other_etag, raw.headers["etag"]}) == 3
+    # A strong and a weak tag for the same render never match each other
+    stale = client.post(
+        GENERATE,
+        json={"data": "one"},
+        headers={"Accept": "image/png", "If-None-Match": json_etag},
+    )
+    assert stale.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ["{etag}", "W/{etag}", '"other", {etag}', "*"],
+)
+def test_png_endpoint_if_none_match_forms(client, render_count, if_none_match):
+    params = {"data": "png", "box_size": 4}
+    etag = client.get(f"{GENERATE}.png", params=params).headers["etag"]
+
+    response = client.get(
+        f"{GENERATE}.png",
+        params=params,
+        headers={"If-None-Match": if_none_match.format(etag=etag)},
+    )
+
+    assert response.status_code == 304
+    assert len(render_count) == 1
+
+
+def test_png_endpoint_serves_identical_bytes_for_its_etag(client):
+    params = {"data": "stable", "box_size": 4}
+    first = client.get(f"{GENERATE}.png", params=params)
+    QRCodeGeneratorService.render_cache.clear()
+    second = client.get(f"{GENERATE}.png", params=params)
+
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.content == second.content
+    assert Image.open(io.BytesIO(first.content)).format == "PNG"
+
+
+def test_static_metadata_revalidates(client):
+    response = client.get(f"{GENERATE}/module-drawers")
+    revalidated = client.get(
+        f"{GENERATE}/module-drawers",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+
+    assert response.status_code == 200
+    assert revalidated.status_code == 304
+
+
+def test_batch_ndjson_streams_results_in_order(client):
+    data = ["first", "x" * 3000, "third"]
+    response = client.post(
+        f"{GENERATE}/batch", json={"data": data, "error_correction": "H"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line["data"] for line in lines] == data
+    # The payload that does not fit any version fails in place
+    assert "error" in lines[1] and "image" not in lines[1]
+    for line in (lines[0], lines[2]):
+        image = Image.open(io.BytesIO(base64.b64decode(line["image"])))
+        assert line["format"] == "png"
+        assert image.size == (line["size"]["width"], line["size"]["height"])
+
+
+def test_batch_zip_names_files_by_index(client):
+    response = client.post(
+        f"{GENERATE}/batch",
+        json={
+            "data": ["a", "x" * 3000, "c"],
+            "error_correction": "H",
+            "output_format": "svg",
+            "stream_format": "zip",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["00000.svg", "00001.error.json", "00002.svg"]
+        assert archive.read("00000.svg").startswith(b"<svg")
+        error = json.loads(archive.read("00001.error.json"))
+        assert error["data"] == "x" * 3000
+        assert error["error"]["code"]
+
+
+def test_batch_spans_several_chunks(client, monkeypatch):
+    from core.config import settings
+
+    monkeypatch.setattr(settings.qr_batch, "chunk_size", 2)
+    data = [f"item-{index}" for index in range(7)]
+    response = client.post(
+        f"{GENERATE}/batch", json={"data": data, "output_format": "ascii"}
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["data"] for line in lines] == data
+
+
+@pytest.mark.parametrize(
+    "body, code",
+    [
+        (
+            {"data": ["a"], "use_styled_image": True, "embedded_image": "bm90"},
+            "embedded_image_requires_h",
+        ),
+        (
+            {
+                "data": ["a"],
+                "use_styled_image": True,
+                "color_mask": {"type": "image", "color_mask_image": "bm90IGFuIGltYWdl"},
+            },
+            "invalid_color_mask_image",
+        ),
+        (
+            {
+                "data": ["a"],
+                "use_styled_image": True,
+                "error_correction": "H",
+                "embedded_image": "bm90IGFuIGltYWdl",
+            },
+            "invalid_embedded_image",
+        ),
+        (
+            {"data": ["a"], "output_format": "svg", "final_size": 200},
+            "final_size_png_only",
+        ),
+    ],
+)
+def test_batch_rejects_bad_shared_options_before_streaming(client, body, code):
+    response = client.post(f"{GENERATE}/batch", json=body)
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["code"] == code
+
+
+def test_batch_size_limit(client, monkeypatch):
+    from core.config import settings
+
+    monkeypatch.setattr(settings.qr_batch, "max_items", 2)
+    response = client.post(f"{GENERATE}/batch", json={"data": ["a", "b", "c"]})
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["code"] == "batch_too_large"
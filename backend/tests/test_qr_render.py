@@ -0,0 +1,141 @@
+import io
+import re
+from contextlib import redirect_stdout
+
+import pytest
+from PIL import Image, ImageChops
+from qrcode import QRCode, constants
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles import colormasks
+
+from services import qr_color_masks
+from services.qr_matrix import QRMatrix
+from services.qr_serializers import svg_path_data, to_ascii
+
+PAYLOADS = [("a", None), ("https://example.com/artifice", None), ("x" * 200, 12)]
+
+
+def library_qr(data: str, version: int | None) -> QRCode:
+    qr = QRCode(version=version, error_correction=constants.ERROR_CORRECT_M)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+@pytest.mark.parametrize("data, version", PAYLOADS)
+def test_matrix_round_trips_the_library_modules(data, version):
+    qr = library_qr(data, version)
+    matrix = QRMatrix.encode(data, version, constants.ERROR_CORRECT_M)
+
+    assert (matrix.version, matrix.size) == (qr.version, qr.modules_count)
+    assert len(matrix.bits) == matrix.size * ((matrix.size + 7) // 8)
+    assert matrix.rows() == [[bool(module) for module in row] for row in qr.modules]
+
+
+@pytest.mark.parametrize("data, version", PAYLOADS)
+def test_ascii_matches_print_ascii(data, version):
+    qr = library_qr(data, version)
+    matrix = QRMatrix.encode(data, version, constants.ERROR_CORRECT_M)
+    output = io.StringIO()
+    with redirect_stdout(output):
+        qr.print_ascii(out=output)
+
+    assert to_ascii(matrix, qr.border) == output.getvalue()
+
+
+@pytest.mark.parametrize("data, version", PAYLOADS)
+def test_svg_path_covers_exactly_the_dark_modules(data, version):
+    matrix = QRMatrix.encode(data, version, constants.ERROR_CORRECT_M)
+    border = 4
+
+    covered = set()
+    for x, y, width in re.findall(
+        r"M(\d+),(\d+)h(\d+)v1h-\d+z", svg_path_data(matrix, border)
+    ):
+        covered.update(
+            (int(x) + dx - border, int(y) - border) for dx in range(int(width))
+        )
+
+    rows = matrix.rows()
+    dark = {
+        (x, y) for y, row in enumerate(rows) for x, module in enumerate(row) if module
+    }
+    assert covered == dark
+
+
+# Radial and square distances are computed in float32, so a few pixels may
+# land one level off the library's float64 result
+MASKS = [
+    (
+        qr_color_masks.SolidColorMask,
+        colormasks.SolidFillColorMask,
+        {"front_color": (200, 30, 60)},
+        0,
+    ),
+    (
+        qr_color_masks.RadialGradientColorMask,
+        colormasks.RadialGradiantColorMask,
+        {"center_color": (255, 0, 0), "edge_color": (0, 0, 255)},
+        1,
+    ),
+    (
+        qr_color_masks.SquareGradientColorMask,
+        colormasks.SquareGradiantColorMask,
+        {"center_color": (10, 200, 10), "edge_color": (90, 0, 90)},
+        1,
+    ),
+    (
+        qr_color_masks.HorizontalGradientColorMask,
+        colormasks.HorizontalGradiantColorMask,
+        {"left_color": (0, 0, 0), "right_color": (0, 120, 255)},
+        0,
+    ),
+    (
+        qr_color_masks.VerticalGradientColorMask,
+        colormasks.VerticalGradiantColorMask,
+        {"top_color": (255, 128, 0), "bottom_color": (20, 20, 20)},
+        0,
+    ),
+]
+
+
+@pytest.mark.parametrize("ours, library, colors, tolerance", MASKS)
+def test_color_masks_match_the_per_pixel_library_masks(
+    ours, library, colors, tolerance
+):
+    qr = QRCode(box_size=3, border=2)
+    qr.add_data("artifice")
+    qr.make(fit=True)
+
+    images = [
+        qr.make_image(
+            image_factory=StyledPilImage,
+            color_mask=mask(back_color=(250, 245, 230), **colors),
+        ).get_image()
+        for mask in (ours, library)
+    ]
+
+    extrema = ImageChops.difference(*images).getextrema()
+    assert max(high for _, high in extrema) <= tolerance
+
+
+def test_whole_image_color_mask_is_abstract():
+    with pytest.raises(TypeError):
+        qr_color_masks.WholeImageColorMask()
+
+
+def test_image_pattern_mask_matches_library():
+    pattern = Image.radial_gradient("L").convert("RGB").resize((64, 64))
+    qr = QRCode(box_size=3, border=2)
+    qr.add_data("artifice")
+    qr.make(fit=True)
+
+    images = [
+        qr.make_image(
+            image_factory=StyledPilImage,
+            color_mask=mask(back_color=(255, 255, 255), color_mask_image=pattern),
+        ).get_image()
+        for mask in (qr_color_masks.ImagePatternColorMask, colormasks.ImageColorMask)
+    ]
+
+    assert images[0].tobytes() == images[1].tobytes()
@@ -0,0 +1,159 @@
+import base64
+import threading
+import time
+
+import pytest
+from conftest import qr_png
+
+from core.config import settings
+from services.qr_scanner_service import QRCodeScannerService
+
+SCAN = "/api/v1/qr/scan"
+DATA = "https://example.com/scan"
+
+
+@pytest.fixture(scope="module")
+def png() -> bytes:
+    return qr_png(DATA)
+
+
+@pytest.fixture
+def max_upload_bytes(monkeypatch):
+    def limit(value: int) -> None:
+        monkeypatch.setattr(settings.qr_scan_input, "max_upload_bytes", value)
+
+    return limit
+
+
+def error_code(response) -> str:
+    return response.json()["detail"]["code"]
+
+
+def test_scan_json_raw_and_multipart(client, png):
+    encoded = base64.b64encode(png).decode()
+    responses = [
+        client.post(SCAN, json={"image": f"data:image/png;base64,{encoded}"}),
+        client.post(SCAN, content=png, headers={"Content-Type": "image/png"}),
+        client.post(
+            SCAN,
+            content=png,
+            headers={"Content-Type": "application/octet-stream"},
+            params={"auto_resize": "false"},
+        ),
+        client.post(SCAN, files={"image": ("code.png", png, "image/png")}),
+    ]
+
+    for response in responses:
+        assert response.status_code == 200, response.text
+        assert response.json() == {"codes": [DATA], "count": 1, "success": True}
+
+
+def test_raw_upload_over_the_limit(client, png, max_upload_bytes):
+    max_upload_bytes(len(png) - 1)
+
+    response = client.post(SCAN, content=png, headers={"Content-Type": "image/png"})
+
+    assert response.status_code == 413
+    assert error_code(response) == "image_too_large"
+    assert response.json()["detail"]["context"] == {"max_bytes": len(png) - 1}
+
+
+def test_streamed_raw_upload_over_the_limit(client, png, max_upload_bytes):
+    # No Content-Length: the limit is enforced while the body streams in
+    max_upload_bytes(len(png) - 1)
+
+    response = client.post(
+        SCAN,
+        content=iter([png[:100], png[100:]]),
+        headers={"Content-Type": "image/png"},
+    )
+
+    assert "content-length" not in response.request.headers
+    assert response.status_code == 413
+
+
+def test_declared_length_is_checked_before_reading(client, monkeypatch):
+    monkeypatch.setattr(settings.qr_scan_input, "max_upload_bytes", 10)
+
+    def never_read(*args, **kwargs):
+        raise AssertionError("body read despite an oversized Content-Length")
+
+    monkeypatch.setattr("starlette.requests.Request.form", never_read)
+    monkeypatch.setattr("starlette.requests.Request.stream", never_read)
+
+    for content_type in ("image/png", "multipart/form-data; boundary=x"):
+        response = client.post(
+            SCAN,
+            content=b"x" * (settings.qr_scan_input.max_upload_bytes + 64 * 1024 + 1),
+            headers={"Content-Type": content_type},
+        )
+        assert response.status_code == 413
+
+
+@pytest.mark.parametrize("content_type", ["image/png", "multipart/form-data; b=x"])
+def test_malformed_content_length(client, content_type):
+    response = client.post(
+        SCAN,
+        content=b"abc",
+        headers={"Content-Type": content_type, "Content-Length": "abc"},
+    )
+
+    assert response.status_code == 400
+    assert error_code(response) == "invalid_content_length"
+
+
+def test_multipart_file_over_the_limit(client, png, max_upload_bytes):
+    # Within the multipart allowance, so the file size check catches it
+    max_upload_bytes(len(png) - 1)
+
+    response = client.post(SCAN, files={"image": ("code.png", png, "image/png")})
+
+    assert response.status_code == 413
+
+
+def test_multipart_without_image_file(client):
+    response = client.post(SCAN, data={"image": "not a file"}, files={"x": b""})
+
+    assert response.status_code == 400
+    assert error_code(response) == "missing_image"
+
+
+def test_undecodable_upload(client):
+    response = client.post(
+        SCAN, content=b"not an image", headers={"Content-Type": "image/png"}
+    )
+
+    assert response.status_code == 400
+    assert error_code(response) == "invalid_image"
+
+
+def test_upload_stays_open_for_a_timed_out_scan(client, png, monkeypatch):
+    monkeypatch.setattr(QRCodeScannerService.scan_pool.config, "timeout", 0.05)
+    release = threading.Event()
+    reads = []
+    scan_file = QRCodeScannerService._scan_file
+
+    def slow_scan(image_file, auto_resize, stages=None):
+        release.wait(5)
+        reads.append(image_file.read(8))
+        image_file.seek(0)
+        return scan_file(image_file, auto_resize, stages)
+
+    monkeypatch.setattr(QRCodeScannerService, "_scan_file", slow_scan)
+
+    try:
+        responses = [
+            client.post(SCAN, content=png, headers={"Content-Type": "image/png"}),
+            client.post(SCAN, files={"image": ("code.png", png, "image/png")}),
+        ]
+        assert [response.status_code for response in responses] == [504, 504]
+    finally:
+        release.set()
+
+    deadline = time.monotonic() + 5
+    while QRCodeScannerService.scan_pool.stats()["pending"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    # Scans that started before the timeout still read their upload; queued
+    # ones were dropped
+    assert reads and all(read == png[:8] for read in reads)
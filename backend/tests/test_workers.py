@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.config import WorkerPoolConfig
+from services.exceptions import ServiceError
+from services.workers import WorkerPool
+
+
+def make_pool(**config) -> WorkerPool:
+    return WorkerPool("test", WorkerPoolConfig(backend="thread", workers=1, **config))
+
+
+def wait_until(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_run_returns_the_result_and_frees_the_slot():
+    pool = make_pool()
+    try:
+        assert asyncio.run(pool.run(pow, 2, 10)) == 1024
+        wait_until(lambda: pool.stats()["pending"] == 0)
+    finally:
+        pool.shutdown()
+
+
+def test_full_pool_rejects_with_retry_after():
+    pool = make_pool(max_queue=0, retry_after=7)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceError) as exc_info:
+            await pool.run(pow, 2, 2)
+        release.set()
+        await first
+        return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+
+    assert error.status_code == 503
+    assert error.code == "test_queue_full"
+    assert error.headers == {"Retry-After": "7"}
+    assert pool.rejected == 1
+
+
+def test_timed_out_work_keeps_its_slot_until_it_ends():
+    pool = make_pool(max_queue=0, timeout=0.05)
+    release = threading.Event()
+    done = []
+
+    async def timeout():
+        with pytest.raises(ServiceError) as exc_info:
+            await pool.run(release.wait, on_done=lambda: done.append(True))
+        return exc_info.value
+
+    try:
+        error = asyncio.run(timeout())
+        assert error.status_code == 504
+        # The worker is still busy, so its slot is still taken
+        assert pool.stats()["pending"] == 1
+        assert done == []
+        with pytest.raises(ServiceError) as exc_info:
+            asyncio.run(pool.run(pow, 2, 2))
+        assert exc_info.value.status_code == 503
+
+        release.set()
+        wait_until(lambda: pool.stats()["pending"] == 0)
+        assert done == [True]
+        assert asyncio.run(pool.run(pow, 2, 2)) == 4
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_queued_work_is_dropped_on_disconnect():
+    pool = make_pool()
+    release = threading.Event()
+    ran = []
+
+    async def disconnected() -> bool:
+        return True
+
+    async def scenario():
+        busy = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceError) as exc_info:
+            await pool.run(ran.append, True, is_cancelled=disconnected)
+        release.set()
+        await busy
+        return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+        wait_until(lambda: pool.stats()["pending"] == 0)
+    finally:
+        release.set()
+        pool.shutdown()
+
+    assert error.status_code == 499
+    assert pool.cancelled == 1
+    assert ran == []
+
+
+def test_failed_work_frees_the_slot_and_calls_on_done():
+    pool = make_pool()
+    done = []
+
+    try:
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(pool.run(divmod, 1, 0, on_done=lambda: done.append(True)))
+        wait_until(lambda: pool.stats()["pending"] == 0)
+    finally:
+        pool.shutdown()
+
+    assert done == [True]
+
+
+def test_rejected_and_inline_work_call_on_done():
+    done = []
+
+    inline = WorkerPool("inline", WorkerPoolConfig(backend="inline"))
+    assert asyncio.run(inline.run(pow, 3, 2, on_done=lambda: done.append("inline")))
+
+    pool = make_pool(max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceError):
+            await pool.run(pow, 2, 2, on_done=lambda: done.append("rejected"))
+        release.set()
+        await busy
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+
+    assert done == ["inline", "rejected"]